@@ -0,0 +1,31 @@
+import hashlib
+
+from django.test import SimpleTestCase
+
+from apps.common.utils.hashing import ResumableSHA256
+
+
+class ResumableSHA256Test(SimpleTestCase):
+    """Test the hash of chunks is resumed from its stored state"""
+
+    def test_resumed_hash_matches_sha256(self):
+        """Test hashing resumed from the state matches hashing at once"""
+
+        content = b'ID3' + bytes(range(256)) * 1000
+        state = ResumableSHA256().state
+        for start in range(0, len(content), 1000):
+            hasher = ResumableSHA256(state)
+            hasher.update(content[start:start + 1000])
+            state = hasher.state
+
+        hasher = ResumableSHA256(state)
+        self.assertEqual(hasher.hexdigest(),
+                         hashlib.sha256(content).hexdigest())
+        # finishing leaves the state as it was
+        self.assertEqual(hasher.state, state)
+
+    def test_empty_state_starts_a_hash(self):
+        """Test no state is the hash of no bytes"""
+
+        self.assertEqual(ResumableSHA256(b'').hexdigest(),
+                         hashlib.sha256().hexdigest())
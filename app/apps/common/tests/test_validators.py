@@ -0,0 +1,75 @@
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import ValidationError
+
+from apps.common.utils.validators import UploadHeader, validate_file_type, \
+    validate_image_size
+from apps.media.serializers import ImageSerializer
+
+
+def image_upload(width, height):
+    f = BytesIO()
+    Image.new('RGB', (width, height)).save(f, 'PNG')
+    return SimpleUploadedFile('cover.png', f.getvalue(),
+                              content_type='image/png')
+
+
+class UploadValidatorsTest(TestCase):
+    """Test uploads are validated from their header"""
+
+    def test_header_is_read_once(self):
+        """Test the validators of the serializer and the model share one
+        read
+        """
+
+        upload = image_upload(400, 300)
+
+        with patch('apps.common.utils.validators.UploadHeader',
+                   wraps=UploadHeader) as header, \
+                patch('apps.common.utils.validators.Image.open',
+                      wraps=Image.open) as image_open:
+            serializer = ImageSerializer(data={'file': upload})
+            self.assertTrue(serializer.is_valid())
+            validate_image_size(upload)
+
+        self.assertEqual(header.call_count, 1)
+        self.assertEqual(image_open.call_count, 1)
+
+    def test_small_image_is_rejected(self):
+        """Test the image dimensions come from the header"""
+
+        with self.assertRaises(ValidationError):
+            validate_image_size(image_upload(200, 100))
+
+    @override_settings(UPLOAD_HEADER_SIZE=16)
+    def test_header_larger_than_buffer(self):
+        """Test an image header that doesn't fit the buffer is parsed from the
+        file
+        """
+
+        validate_image_size(image_upload(400, 300))
+
+    def test_not_an_image_is_rejected(self):
+        """Test a file that isn't an image fails the size check"""
+
+        with self.assertRaises(ValidationError):
+            validate_image_size(SimpleUploadedFile('cover.png',
+                                                   b'not an image'))
+
+    def test_audio_container_is_detected(self):
+        """Test audio is recognized from its magic bytes, in files and in
+        chunks
+        """
+
+        validate_file_type(SimpleUploadedFile('chapter.mp3',
+                                              b'ID3' + bytes(100)))
+        validate_file_type(b'OggS' + bytes(100))
+
+        with self.assertRaises(ValidationError):
+            validate_file_type(SimpleUploadedFile('chapter.mp3',
+                                                  b'not audio' * 10))
@@ -0,0 +1,55 @@
+import json
+import subprocess
+
+from django.conf import settings
+
+from apps.common.utils.signed_urls import presign
+
+
+def probe_source(storage, name):
+    """Local path of a stored file, or a signed URL that ffprobe reads with
+    range requests so only the headers and frames it needs are downloaded
+    """
+
+    try:
+        return storage.path(name)
+    except NotImplementedError:
+        return presign(storage, name, settings.SIGNED_URL_TTL,
+                       internal=True)
+
+
+def parse_number(value, cast=int):
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def read_audio_metadata(storage, name):
+    """Read the duration in seconds, bitrate in kbps, codec and sample rate
+    of a stored audio file
+    """
+
+    command = [settings.FFPROBE_BINARY, '-v', 'error',
+               '-select_streams', 'a:0',
+               '-show_entries', 'format=duration,bit_rate:'
+                                'stream=codec_name,sample_rate,bit_rate',
+               '-of', 'json', probe_source(storage, name)]
+    output = subprocess.run(command, check=True, capture_output=True,
+                            timeout=settings.TRACK_PROBE_TIMEOUT).stdout
+    probe = json.loads(output)
+
+    streams = probe.get('streams') or [{}]
+    stream = streams[0]
+    audio_format = probe.get('format', {})
+
+    # the container bitrate covers VBR files the stream doesn't report for
+    bitrate = parse_number(stream.get('bit_rate')) or \
+        parse_number(audio_format.get('bit_rate'))
+    duration = parse_number(audio_format.get('duration'), float)
+    return {
+        'duration': round(duration) if duration is not None else None,
+        'bitrate': bitrate // 1000 if bitrate else None,
+        'codec': stream.get('codec_name', ''),
+        'sample_rate': parse_number(stream.get('sample_rate')),
+    }
@@ -15,6 +15,19 @@ def is_item_already_purchased(request, media):
         return False
 
 
+def is_track_available(request, track):
+    """Samples are free to play, other tracks need a purchased media"""
+
+    if track.sample:
+        return True
+
+    return OrderMedia.objects.filter(
+        media__tracks=track,
+        user=request.user,
+        ordered=True
+    ).exists()
+
+
 def is_coupon_used_by_current_user(request, coupon):
     coupon_qs = Order.objects.filter(
                 user=request.user, coupon__code=coupon.code)
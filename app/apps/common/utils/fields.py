@@ -0,0 +1,95 @@
+import os
+import hashlib
+
+from django import forms
+from django.db import models
+from django.db.models.fields.files import FieldFile, ImageFieldFile
+
+
+def content_hash(content):
+    """sha256 of a file, taken from the upload handlers when they already
+    hashed it
+    """
+
+    digest = getattr(content, 'sha256', None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+    return digest
+
+
+def content_addressed_name(directory, filename, content):
+    """Name of a file by the hash of its content, keeping its extension"""
+
+    return digest_name(directory, filename, content_hash(content))
+
+
+def digest_name(directory, filename, digest):
+    """Name of a file with the given sha256, keeping its extension"""
+
+    ext = os.path.splitext(filename)[-1].lower()
+    return os.path.join(directory, digest[:2], '{}{}'.format(digest, ext))
+
+
+class ContentAddressedFieldFileMixin:
+    """Stores the file under the hash of its content. Uploading bytes that are
+    already stored only points the field at the existing object.
+    """
+
+    def save(self, name, content, save=True):
+        name = content_addressed_name(self.field.upload_to, name, content)
+        if not self.storage.exists(name):
+            name = self.storage.save(name, content,
+                                     max_length=self.field.max_length)
+        self.name = name
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+    def delete(self, save=True):
+        # the object may be shared, unreferenced objects are removed by
+        # delete_unreferenced_blobs
+        self.name = None
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = False
+
+        if save:
+            self.instance.save()
+
+    delete.alters_data = True
+
+
+class ContentAddressedFieldFile(ContentAddressedFieldFileMixin, FieldFile):
+    pass
+
+
+class ContentAddressedImageFieldFile(ContentAddressedFieldFileMixin,
+                                     ImageFieldFile):
+    pass
+
+
+class ContentAddressedFileField(models.FileField):
+    """FileField whose upload_to is the directory of the content addressed
+    files
+    """
+
+    attr_class = ContentAddressedFieldFile
+
+
+class ContentAddressedImageField(models.ImageField):
+    """ImageField whose upload_to is the directory of the content addressed
+    files
+    """
+
+    attr_class = ContentAddressedImageFieldFile
+
+    def formfield(self, **kwargs):
+        # validate_image_size reads the header, forms.ImageField would decode
+        # the whole image again
+        return super().formfield(**{'form_class': forms.FileField, **kwargs})
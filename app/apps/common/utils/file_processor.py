@@ -1,7 +1,10 @@
 import os
 import logging
+from functools import lru_cache
+from PIL import Image
 
 from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
 from django.core.files.storage import default_storage
 
 
@@ -53,4 +56,41 @@ def get_watermark_size(uploaded_image, logo_max_width_height_ratio):
 def get_watermark_top_left(water_mark_image, logo_top_left_ratio):
     actual_img_width, actual_img_height = water_mark_image.width, water_mark_image.height
     return (int(actual_img_width * logo_top_left_ratio),
-            int(actual_img_height * logo_top_left_ratio))
\ No newline at end of file
+            int(actual_img_height * logo_top_left_ratio))
+
+
+@lru_cache(maxsize=1)
+def get_logo():
+    """The decoded watermark logo, read from the static storage once per
+    worker process
+    """
+
+    with staticfiles_storage.open('img/logo.png') as f:
+        return Image.open(f).convert("RGBA")
+
+
+@lru_cache(maxsize=64)
+def get_resized_logo(size):
+    """The watermark logo resized to (width, height), every image size and
+    ratio pair needs one
+    """
+
+    return get_logo().resize(size)
+
+
+def resize_and_watermark(image, width, watermark=False,
+                         logo_max_width_height_ratio=0.06,
+                         logo_top_left_ratio=0.02):
+    """Downscale the image to width, then paste the logo onto the small image.
+    The logo is sized and placed relative to the result, as if it was pasted
+    before resizing, without compositing at full resolution.
+    """
+
+    resized = image.resize(get_base_size(image, width), reducing_gap=2.0)
+    if watermark:
+        logo = get_resized_logo(
+            get_watermark_size(resized, logo_max_width_height_ratio))
+        resized.paste(logo,
+                      get_watermark_top_left(resized, logo_top_left_ratio),
+                      mask=logo)
+    return resized
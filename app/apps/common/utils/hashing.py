@@ -0,0 +1,43 @@
+import ctypes
+
+import _hashlib
+
+# the OpenSSL hashlib is built with, its SHA-256 context is a plain struct that
+# can be saved between requests, unlike a hashlib object
+_libcrypto = ctypes.CDLL(_hashlib.__file__)
+_libcrypto.SHA256_Init.argtypes = [ctypes.c_char_p]
+_libcrypto.SHA256_Update.argtypes = [ctypes.c_char_p, ctypes.c_char_p,
+                                     ctypes.c_size_t]
+_libcrypto.SHA256_Final.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
+
+# sizeof(SHA256_CTX)
+SHA256_STATE_SIZE = 112
+
+
+class ResumableSHA256:
+    """sha256 whose state can be stored and resumed, so a file sent over
+    several requests is hashed as its chunks arrive
+    """
+
+    def __init__(self, state=b''):
+        if state:
+            self.context = ctypes.create_string_buffer(bytes(state),
+                                                       SHA256_STATE_SIZE)
+        else:
+            self.context = ctypes.create_string_buffer(SHA256_STATE_SIZE)
+            _libcrypto.SHA256_Init(self.context)
+
+    @property
+    def state(self):
+        return self.context.raw
+
+    def update(self, data):
+        data = bytes(data)
+        _libcrypto.SHA256_Update(self.context, data, len(data))
+
+    def hexdigest(self):
+        # finishing clears the context, the state stays resumable
+        context = ctypes.create_string_buffer(self.state, SHA256_STATE_SIZE)
+        digest = ctypes.create_string_buffer(32)
+        _libcrypto.SHA256_Final(digest, context)
+        return digest.raw.hex()
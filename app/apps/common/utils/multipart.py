@@ -0,0 +1,149 @@
+import os
+from functools import lru_cache
+
+import boto3
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def s3_client(endpoint_url, access_key, secret_key):
+    """One boto3 client per endpoint, the clients are thread safe"""
+
+    return boto3.client(
+        's3',
+        endpoint_url=endpoint_url,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+    )
+
+
+class MultipartUpload:
+    """Writes a file to a storage in parts, then publishes it under its name
+    without copying the bytes again.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @classmethod
+    def for_storage(cls, storage):
+        if hasattr(storage, 'client') and hasattr(storage, 'bucket_name'):
+            return MinioMultipartUpload(storage)
+        if hasattr(storage, 'bucket') and hasattr(storage, 'connection'):
+            return S3MultipartUpload(storage)
+        return FileSystemMultipartUpload(storage)
+
+    def start(self, name, content_type):
+        """Start an upload and return its id"""
+        raise NotImplementedError
+
+    def upload_part(self, name, upload_id, part_number, offset, data):
+        """Store the part starting at offset and return its ETag. Sending a
+        part again replaces it.
+        """
+        raise NotImplementedError
+
+    def complete(self, name, upload_id, parts):
+        raise NotImplementedError
+
+    def abort(self, name, upload_id):
+        raise NotImplementedError
+
+    def move(self, name, target):
+        """Rename a completed upload within the storage"""
+        raise NotImplementedError
+
+
+class S3MultipartUpload(MultipartUpload):
+    """S3 multipart upload, parts but the last one have to be at least 5 MB"""
+
+    def get_client(self):
+        return self.storage.connection.meta.client
+
+    def get_key(self, name):
+        return self.storage._normalize_name(self.storage._clean_name(name))
+
+    def start(self, name, content_type):
+        return self.get_client().create_multipart_upload(
+            Bucket=self.storage.bucket_name, Key=self.get_key(name),
+            ContentType=content_type)['UploadId']
+
+    def upload_part(self, name, upload_id, part_number, offset, data):
+        return self.get_client().upload_part(
+            Bucket=self.storage.bucket_name, Key=self.get_key(name),
+            UploadId=upload_id, PartNumber=part_number, Body=data)['ETag']
+
+    def complete(self, name, upload_id, parts):
+        self.get_client().complete_multipart_upload(
+            Bucket=self.storage.bucket_name, Key=self.get_key(name),
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [
+                {'PartNumber': number, 'ETag': etag} for number, etag in parts
+            ]})
+
+    def abort(self, name, upload_id):
+        self.get_client().abort_multipart_upload(
+            Bucket=self.storage.bucket_name, Key=self.get_key(name),
+            UploadId=upload_id)
+
+    def move(self, name, target):
+        # copied by the storage, the bytes don't pass through the app
+        client = self.get_client()
+        client.copy_object(
+            Bucket=self.storage.bucket_name, Key=self.get_key(target),
+            CopySource={'Bucket': self.storage.bucket_name,
+                        'Key': self.get_key(name)})
+        client.delete_object(Bucket=self.storage.bucket_name,
+                             Key=self.get_key(name))
+
+
+class MinioMultipartUpload(S3MultipartUpload):
+    """MinIO speaks the S3 multipart API, the minio client only has it
+    privately
+    """
+
+    def get_client(self):
+        scheme = 'https' if settings.MINIO_STORAGE_USE_HTTPS else 'http'
+        endpoint_url = '{}://{}'.format(scheme,
+                                        settings.MINIO_STORAGE_ENDPOINT)
+        return s3_client(endpoint_url, settings.MINIO_STORAGE_ACCESS_KEY,
+                         settings.MINIO_STORAGE_SECRET_KEY)
+
+    def get_key(self, name):
+        return name
+
+
+class FileSystemMultipartUpload(MultipartUpload):
+    """Appends the parts to a hidden file that is renamed on completion"""
+
+    def get_partial_path(self, name):
+        path = self.storage.path(name)
+        return os.path.join(os.path.dirname(path),
+                            '.{}.upload'.format(os.path.basename(path)))
+
+    def start(self, name, content_type):
+        path = self.get_partial_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+        return name
+
+    def upload_part(self, name, upload_id, part_number, offset, data):
+        with open(self.get_partial_path(name), 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+        return str(part_number)
+
+    def complete(self, name, upload_id, parts):
+        os.replace(self.get_partial_path(name), self.storage.path(name))
+
+    def abort(self, name, upload_id):
+        try:
+            os.remove(self.get_partial_path(name))
+        except FileNotFoundError:
+            pass
+
+    def move(self, name, target):
+        path = self.storage.path(target)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.storage.path(name), path)
@@ -0,0 +1,129 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Field, Func, Q, Value
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class Row(Func):
+    """Row constructor, (a, b) < (x, y) compares the rows in order"""
+
+    function = 'ROW'
+    output_field = Field()
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page number pagination with an opt-in keyset (cursor) mode.
+
+    Clients that pass ``?cursor=`` get pages ordered by the view's
+    ``keyset_ordering`` and follow the ``next`` link. Each page is fetched with
+    ``WHERE (key) < (last key) LIMIT n``, without the COUNT(*) and OFFSET of
+    page numbers, so deep pages cost the same as the first one. The ordering
+    has to end with a unique field, e.g. ``('-sequence', '-id')``.
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    keyset_ordering = ('-id',)
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = getattr(view, 'keyset_ordering', self.keyset_ordering)
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = self.after(queryset, position)
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # one extra row tells whether there is a next page
+        page = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = [getattr(page[-1], field.lstrip('-'))
+                                  for field in self.ordering]
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'results': data,
+        })
+
+    def get_next_cursor_link(self):
+        if self.next_position is None:
+            return None
+
+        position = json.dumps(self.next_position, cls=DjangoJSONEncoder)
+        cursor = urlsafe_b64encode(position.encode())
+        return replace_query_param(self.request.build_absolute_uri(),
+                                   self.cursor_query_param, cursor.decode())
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or \
+                len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def after(self, queryset, position):
+        """Rows after the position. When every field is ordered the same way
+        this is a row comparison the index serves, e.g. for
+        ('-sequence', '-id'): (sequence, id) < (s, i). Mixed directions are
+        expanded to a > x OR (a = x AND b < y) behind an a >= x bound the
+        index can use.
+        """
+
+        names = [field.lstrip('-') for field in self.ordering]
+        descending = [field.startswith('-') for field in self.ordering]
+        values = [
+            Value(model_field.to_python(value), output_field=model_field)
+            for model_field, value in zip(
+                (queryset.model._meta.get_field(name) for name in names),
+                position)
+        ]
+
+        if len(set(descending)) == 1:
+            lookup = 'keyset_position__{}'.format(
+                'lt' if descending[0] else 'gt')
+            return queryset.alias(keyset_position=Row(*names)) \
+                .filter(**{lookup: Row(*values)})
+
+        conditions = []
+        for index, name in enumerate(names):
+            lookup = '{}__{}'.format(name, 'lt' if descending[index] else 'gt')
+            equal = dict(zip(names[:index], values))
+            conditions.append(Q(**equal) & Q(**{lookup: values[index]}))
+
+        bound = '{}__{}'.format(names[0], 'lte' if descending[0] else 'gte')
+        return queryset.filter(Q(**{bound: values[0]}),
+                               reduce(lambda a, b: a | b, conditions))
@@ -0,0 +1,19 @@
+import os
+
+from django.core.files import File
+
+
+def rendition_dir(directory, source_hash):
+    """Renditions are stored by the hash of their source, so a file is
+    processed once and a retried job finds its outputs in place
+    """
+
+    return os.path.join(directory, 'renditions', source_hash)
+
+
+def store_rendition(storage, name, content):
+    # the names are content addressed, an existing object already has these
+    # bytes
+    if not storage.exists(name):
+        storage.save(name, File(content))
+    return name
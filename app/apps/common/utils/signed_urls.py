@@ -0,0 +1,64 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+
+from apps.common.utils.storage import SignedFileSystemStorage
+
+_lock = threading.Lock()
+_signed = {}
+
+
+def presign(storage, name, ttl, internal=False):
+    """Sign a direct download URL of a stored file valid for ttl seconds.
+    Storages that can't sign return their plain URL. Internal URLs are only
+    reachable from the servers and workers.
+    """
+
+    if hasattr(storage, 'client') and hasattr(storage, 'bucket_name'):
+        # minio_storage, the signature covers the host so clients get URLs
+        # signed for MINIO_STORAGE_MEDIA_URL instead of the internal endpoint
+        max_age = timedelta(seconds=ttl)
+        if internal:
+            return storage.client.presigned_get_object(
+                storage.bucket_name, name, expires=max_age)
+        return storage._presigned_url(name, max_age)
+
+    if (hasattr(storage, 'bucket') and hasattr(storage, 'connection')) or \
+            isinstance(storage, SignedFileSystemStorage):
+        # storages.backends.s3boto3 and SignedFileSystemStorage
+        return storage.url(name, expire=ttl)
+
+    return storage.url(name)
+
+
+def signed_url(file):
+    """Signed URL of a FieldFile. Signatures are reused by the process until
+    less than SIGNED_URL_MIN_REMAINING seconds of their SIGNED_URL_TTL are
+    left, so listing the same tracks and images doesn't sign them again.
+    """
+
+    if not file:
+        return None
+
+    storage = file.storage
+    key = (type(storage).__name__, getattr(storage, 'bucket_name', None),
+           file.name)
+    now = time.time()
+    min_remaining = settings.SIGNED_URL_MIN_REMAINING
+
+    cached = _signed.get(key)
+    if cached is not None and cached[1] - now > min_remaining:
+        return cached[0]
+
+    url = presign(storage, file.name, settings.SIGNED_URL_TTL)
+    with _lock:
+        if len(_signed) >= settings.SIGNED_URL_CACHE_SIZE:
+            for stale in [k for k, (_, expires) in _signed.items()
+                          if expires - now <= min_remaining]:
+                del _signed[stale]
+            if len(_signed) >= settings.SIGNED_URL_CACHE_SIZE:
+                _signed.clear()
+        _signed[key] = (url, now + settings.SIGNED_URL_TTL)
+    return url
@@ -0,0 +1,155 @@
+import mimetypes
+import re
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from rest_framework.negotiation import BaseContentNegotiation
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Audio players send Accept headers the API renderers don't match, errors
+    of a streaming view are rendered with the first renderer regardless.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def parse_range(header, size):
+    """Return the inclusive (start, end) of a single byte range, or None to
+    serve the whole file. Multiple ranges are served as the whole file, which
+    RFC 7233 allows.
+    """
+
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # the last n bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def open_range(storage, name, start, length):
+    """Open a readable stream of length bytes from start without downloading
+    the rest of the file. MinIO and S3 are asked for the range, other storages
+    are opened and seeked.
+    """
+
+    if hasattr(storage, 'client') and hasattr(storage, 'bucket_name'):
+        # minio_storage
+        return storage.client.get_partial_object(
+            storage.bucket_name, name, offset=start, length=length)
+
+    if hasattr(storage, 'bucket') and hasattr(storage, 'connection'):
+        # storages.backends.s3boto3
+        key = storage._normalize_name(storage._clean_name(name))
+        return storage.bucket.Object(key).get(
+            Range='bytes={}-{}'.format(start, start + length - 1))['Body']
+
+    stream = storage.open(name, 'rb')
+    stream.seek(start)
+    return stream
+
+
+def iter_range(storage, name, start, end, chunk_size):
+    stream = open_range(storage, name, start, end - start + 1)
+    try:
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = stream.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        stream.close()
+        if hasattr(stream, 'release_conn'):
+            # urllib3 response of minio
+            stream.release_conn()
+
+
+def if_range_matches(request, etag, last_modified):
+    """Whether the Range header applies, i.e. the client's copy is still
+    current
+    """
+
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return etag in parse_etags(if_range)
+    return parse_http_date_safe(if_range) == int(last_modified.timestamp())
+
+
+def stream_file(request, storage, name, etag, last_modified):
+    """Serve a stored file with Range, ETag and Last-Modified support.
+
+    With settings.STREAM_ACCEL_REDIRECT_PREFIX set, only the headers are sent
+    and the bytes are left to nginx through X-Accel-Redirect.
+    """
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is not None:
+        response['ETag'] = etag
+        return response
+
+    if settings.STREAM_ACCEL_REDIRECT_PREFIX:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = \
+            settings.STREAM_ACCEL_REDIRECT_PREFIX + name
+    else:
+        size = storage.size(name)
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size) \
+                if if_range_matches(request, etag, last_modified) else None
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */{}'.format(size)
+            return response
+
+        start, end = byte_range or (0, size - 1)
+        chunks = iter_range(storage, name, start, end,
+                            settings.STREAM_CHUNK_SIZE) if size else iter(())
+        response = StreamingHttpResponse(
+            chunks,
+            status=206 if byte_range else 200,
+            content_type=content_type
+        )
+        response['Content-Length'] = str(end - start + 1) if size else '0'
+        if byte_range:
+            response['Content-Range'] = 'bytes {}-{}/{}'.format(start, end,
+                                                                size)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
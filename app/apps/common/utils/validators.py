@@ -1,20 +1,85 @@
 import filetype
 import logging
+from io import BytesIO
 from PIL import Image
 
 from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 
-def validate_image_size(temp_file):
+class UploadHeader:
+    """What the validators check, read from the first bytes of an upload.
+    Opening an image only parses its header, the pixels are decoded on
+    load().
+    """
+
+    def __init__(self, head, upload=None):
+        self.head = head
+        self.upload = upload
+
+    @cached_property
+    def mime(self):
+        kind = filetype.guess(self.head)
+        return kind.mime if kind is not None else None
+
+    @cached_property
+    def image_size(self):
+        try:
+            with Image.open(BytesIO(self.head)) as img:
+                return img.size
+        except Exception as ex:
+            if self.upload is None or \
+                    len(self.head) < settings.UPLOAD_HEADER_SIZE:
+                logging.error(ex)
+                return None
+        # a header bigger than the buffer, parsed from the file
+        return read_image_size(self.upload)
+
+
+def read_image_size(upload):
+    position = upload.tell()
     try:
-        img = Image.open(temp_file)
-        width, height = img.size
-        max_width_height = max(width, height)
+        upload.seek(0)
+        with Image.open(upload) as img:
+            return img.size
     except Exception as ex:
         logging.error(ex)
+        return None
+    finally:
+        upload.seek(position)
+
+
+def read_header(value):
+    """Header of an upload or of bytes. It is kept on the upload, the
+    serializer and model validators share a single read.
+    """
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return UploadHeader(bytes(value[:settings.UPLOAD_HEADER_SIZE]))
+
+    # a FieldFile wraps the uploaded file
+    upload = getattr(value, '_file', None) or value
+    header = getattr(upload, 'upload_header', None)
+    if header is None:
+        position = upload.tell()
+        upload.seek(0)
+        head = upload.read(settings.UPLOAD_HEADER_SIZE)
+        upload.seek(position)
+
+        header = UploadHeader(head, upload)
+        upload.upload_header = header
+    return header
+
+
+def validate_image_size(temp_file):
+    size = read_header(temp_file).image_size
+    if size is None:
         raise ValidationError(_('Unable to open file to check size'))
 
+    width, height = size
+    max_width_height = max(width, height)
     if max_width_height < 300:
         raise ValidationError(
             _('The minimum width or height of a cover image should be greater '
@@ -23,12 +88,11 @@ def validate_image_size(temp_file):
 
 
 def validate_file_type(temp_file):
-    kind = filetype.guess(temp_file)
-    if kind is None:
+    file_type = read_header(temp_file).mime
+    if file_type is None:
         raise ValidationError(
             _("Can't determine file type.")
         )
-    file_type = kind.mime
     allowed_types = ['audio/mpeg', 'audio/ogg']  # 'video/mp4'
     if file_type not in allowed_types:
         raise ValidationError(
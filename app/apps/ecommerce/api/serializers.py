@@ -2,7 +2,7 @@ from rest_framework import serializers
 from django_countries.serializer_fields import CountryField
 
 from apps.ecommerce.models import Order, OrderMedia, Coupon, Address, Payment
-from apps.media.serializers import MediaSerializer
+from apps.media.serializers import MediaSerializer, MediaSummarySerializer
 
 
 class StringSerializer(serializers.StringRelatedField):
@@ -32,7 +32,10 @@ class OrderMediaSerializer(serializers.ModelSerializer):
         )
 
     def get_media(self, obj):
-        return MediaSerializer(obj.media).data
+        # the full media only when the client asks for ?expand=media
+        if self.context.get('expand_media'):
+            return MediaSerializer(obj.media, context=self.context).data
+        return MediaSummarySerializer(obj.media, context=self.context).data
 
     def get_final_price(self, obj):
         return obj.get_final_price()
@@ -53,7 +56,9 @@ class OrderSerializer(serializers.ModelSerializer):
         )
 
     def get_order_medias(self, obj):
-        return OrderMediaSerializer(obj.medias.all(), many=True).data
+        # Order.objects.with_medias loads the medias with the order
+        return OrderMediaSerializer(obj.medias.all(), many=True,
+                                    context=self.context).data
 
     def get_total(self, obj):
         return obj.get_total()
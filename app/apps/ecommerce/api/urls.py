@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from .views import AddToCartView, OrderDetailView, CheckoutView, \
     AddCouponView, AddressViewSet, CountryListView, OrderMediaDeleteView, \
-    PaymentListView
+    PaymentListView, CartCountView
 
 app_name = 'ecommerce-api'
 
@@ -13,6 +13,7 @@ router.register('addresses', AddressViewSet, 'addresses')
 
 urlpatterns = [
     path('cart/', AddToCartView.as_view(), name='add-to-cart'),
+    path('cart/count/', CartCountView.as_view(), name='cart-count'),
     path('cart/<slug>/', OrderMediaDeleteView.as_view(),
          name='remove-from-cart'),
     path('order/', OrderDetailView.as_view(),
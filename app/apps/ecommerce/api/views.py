@@ -17,13 +17,14 @@ from rest_framework.response import Response
 from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
 
 from apps.ecommerce.models import Order, OrderMedia, Payment, UserProfile, Coupon, \
-    Address
+    Address, CartResult
 from apps.media.models import Media
 from apps.ecommerce.api.serializers import OrderSerializer, AddressSerializer, \
     PaymentSerializer
 
-from apps.common.utils.check import is_item_already_purchased, \
-    is_coupon_used_by_current_user
+from apps.common.utils.check import is_coupon_used_by_current_user
+from apps.common.utils.pagination import KeysetPagination
+from apps.ecommerce.cache import get_cart_count
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
@@ -37,33 +38,26 @@ class AddToCartView(APIView):
             return Response({"detail": "Invalid request"},
                             status=HTTP_400_BAD_REQUEST)
 
-        media = get_object_or_404(Media, slug=slug)
+        media = get_object_or_404(Media.objects.only('pk'), slug=slug)
 
-        if is_item_already_purchased(request, media):
+        result = Order.objects.add_to_cart(request.user, media)
+        if result == CartResult.PURCHASED:
             return Response({"detail": "You already purchased this item"},
                             status=HTTP_400_BAD_REQUEST)
+        if result == CartResult.IN_CART:
+            return Response({"detail": "This item is in the cart."},
+                            status=HTTP_400_BAD_REQUEST)
+        return Response(status=HTTP_200_OK)
 
-        order_media, created = OrderMedia.objects.get_or_create(
-            media=media,
-            user=request.user,
-            ordered=False
-        )
-        order_qs = Order.objects.filter(user=request.user, ordered=False)
-        if order_qs.exists():
-            order = order_qs[0]
-            # check if the order media is in the order
-            if order.medias.filter(media__slug=media.slug).exists():
-                return Response({"detail": "This item is in the cart."},
-                                status=HTTP_400_BAD_REQUEST)
-            else:
-                order.medias.add(order_media)
-                return Response(status=HTTP_200_OK)
-        else:
-            ordered_date = timezone.now()
-            order = Order.objects.create(
-                user=request.user, ordered_date=ordered_date)
-            order.medias.add(order_media)
-            return Response(status=HTTP_200_OK)
+
+class CartCountView(APIView):
+    """Number of medias in the active order, for the cart badge"""
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        return Response({'count': get_cart_count(request.user)},
+                        status=HTTP_200_OK)
 
 
 class OrderMediaDeleteView(DestroyAPIView):
@@ -75,12 +69,30 @@ class OrderMediaDeleteView(DestroyAPIView):
 
 
 class OrderDetailView(RetrieveAPIView):
+    """The active order, its medias are summarized unless ?expand=media is
+    given
+    """
+
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated,)
 
+    def expand_media(self):
+        expand = self.request.query_params.get('expand', '')
+        return 'media' in expand.split(',')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand_media'] = self.expand_media()
+        return context
+
     def get_object(self):
+        if self.expand_media():
+            medias = Media.objects.for_display(self.request.user)
+        else:
+            medias = Media.objects.for_summary()
         try:
-            order = Order.objects.get(user=self.request.user, ordered=False)
+            order = Order.objects.with_medias(medias).get(
+                user=self.request.user, ordered=False)
             return order
         except ObjectDoesNotExist:
             raise Http404("You do not have an active order")
@@ -90,7 +102,8 @@ class CheckoutView(APIView):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request, *args, **kwargs):
-        order = Order.objects.get(user=self.request.user, ordered=False)
+        order = Order.objects.select_related('coupon').get(
+            user=self.request.user, ordered=False)
         userprofile = UserProfile.objects.get(user=self.request.user)
 
         token = request.data.get('stripeToken')
@@ -235,6 +248,8 @@ class CountryListView(APIView):
 class PaymentListView(ListAPIView):
     permission_classes = (IsAuthenticated, )
     serializer_class = PaymentSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-id',)
 
     def get_queryset(self):
         return Payment.objects.filter(user=self.request.user)
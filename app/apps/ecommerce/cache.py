@@ -0,0 +1,29 @@
+from django.core.cache import cache
+from django.db import transaction
+
+# number of medias in the active order of a user, shown on the cart badge. The
+# Order and OrderMedia signals delete it whenever the cart changes.
+CART_COUNT_CACHE_KEY = 'ecommerce:cart_count:{}'
+CART_COUNT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_cart_count(user):
+    if not user.is_authenticated:
+        return 0
+
+    key = CART_COUNT_CACHE_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        # models.py imports this module
+        from apps.ecommerce.models import Order
+
+        count = Order.medias.through.objects.filter(
+            order__user=user, order__ordered=False).count()
+        cache.set(key, count, CART_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_cart_count(user_id):
+    # after the write is visible, a concurrent read can't cache the old count
+    key = CART_COUNT_CACHE_KEY.format(user_id)
+    transaction.on_commit(lambda: cache.delete(key))
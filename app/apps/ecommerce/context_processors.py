@@ -0,0 +1,9 @@
+from apps.ecommerce.cache import get_cart_count
+
+
+def cart(request):
+    """Number of medias in the user's cart, only read when a template renders
+    it
+    """
+
+    return {'cart_media_count': lambda: get_cart_count(request.user)}
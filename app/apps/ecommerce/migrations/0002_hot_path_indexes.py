@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:47
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # build the indexes without locking the tables against writes
+    atomic = False
+
+    dependencies = [
+        ('ecommerce', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['user', 'ordered'], name='order_user_ordered_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ordermedia',
+            index=models.Index(fields=['user', 'media', 'ordered'], name='ordermedia_user_media_idx'),
+        ),
+    ]
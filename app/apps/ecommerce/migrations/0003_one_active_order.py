@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:23
+
+from django.db import migrations, models
+
+# merge the duplicated active orders of a user into the latest one
+MERGE_ACTIVE_ORDERS_SQL = '''
+CREATE TEMPORARY TABLE merged_order ON COMMIT DROP AS
+SELECT id, kept_id FROM (
+    SELECT id, first_value(id) OVER (PARTITION BY user_id ORDER BY start_date DESC, id DESC) AS kept_id
+    FROM ecommerce_order
+    WHERE NOT ordered
+) AS ranked
+WHERE id <> kept_id;
+
+INSERT INTO ecommerce_order_medias (order_id, ordermedia_id)
+SELECT merged_order.kept_id, link.ordermedia_id
+FROM ecommerce_order_medias AS link
+JOIN merged_order ON merged_order.id = link.order_id
+ON CONFLICT DO NOTHING;
+
+DELETE FROM ecommerce_order_medias WHERE order_id IN (SELECT id FROM merged_order);
+DELETE FROM ecommerce_order WHERE id IN (SELECT id FROM merged_order);
+'''
+
+# keep the oldest unordered order media of each user and media
+MERGE_ORDER_MEDIAS_SQL = '''
+CREATE TEMPORARY TABLE merged_order_media ON COMMIT DROP AS
+SELECT id, kept_id FROM (
+    SELECT id, min(id) OVER (PARTITION BY user_id, media_id) AS kept_id
+    FROM ecommerce_ordermedia
+    WHERE NOT ordered
+) AS ranked
+WHERE id <> kept_id;
+
+INSERT INTO ecommerce_order_medias (order_id, ordermedia_id)
+SELECT link.order_id, merged_order_media.kept_id
+FROM ecommerce_order_medias AS link
+JOIN merged_order_media ON merged_order_media.id = link.ordermedia_id
+ON CONFLICT DO NOTHING;
+
+DELETE FROM ecommerce_order_medias WHERE ordermedia_id IN (SELECT id FROM merged_order_media);
+DELETE FROM ecommerce_ordermedia WHERE id IN (SELECT id FROM merged_order_media);
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0002_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(MERGE_ACTIVE_ORDERS_SQL, migrations.RunSQL.noop),
+        migrations.RunSQL(MERGE_ORDER_MEDIAS_SQL, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(condition=models.Q(('ordered', False)), fields=('user',), name='order_one_active_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='ordermedia',
+            constraint=models.UniqueConstraint(condition=models.Q(('ordered', False)), fields=('user', 'media'), name='ordermedia_user_media_unordered_unique'),
+        ),
+    ]
@@ -1,13 +1,24 @@
 from decimal import Decimal
 from secrets import token_urlsafe
 
-from django.db import models
+from django.db import connection, models
+from django.db.models import DecimalField, Prefetch, Q, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
 from django_countries.fields import CountryField
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+    pre_save
 
 from apps.media.models import Media
+from apps.ecommerce.cache import invalidate_cart_count
+
+
+# what OrderMedia.get_final_price returns, the discount price unless it is
+# empty or zero
+FINAL_PRICE = Coalesce(NullIf('media__discount_price', Value(0)),
+                       'media__price')
 
 
 class OrderMedia(models.Model):
@@ -19,6 +30,18 @@ class OrderMedia(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'media', 'ordered'],
+                         name='ordermedia_user_media_idx'),
+        ]
+        constraints = [
+            # a media is in the cart of a user once
+            models.UniqueConstraint(
+                fields=['user', 'media'], condition=Q(ordered=False),
+                name='ordermedia_user_media_unordered_unique'),
+        ]
+
     def __str__(self):
         return f"{ self.media.title }"
 
@@ -38,6 +61,89 @@ class OrderMedia(models.Model):
         return self.get_total_item_price()
 
 
+class CartResult:
+    """Outcome of OrderQuerySet.add_to_cart"""
+
+    ADDED = 'ADDED'
+    IN_CART = 'IN_CART'
+    PURCHASED = 'PURCHASED'
+
+
+class OrderQuerySet(models.QuerySet):
+    """Query helpers for the cart and checkout"""
+
+    def add_to_cart(self, user, media):
+        """Put a media in the user's active order in one statement. The order
+        and the order media are upserted against the partial unique
+        constraints, so concurrent adds share them. Returns a CartResult.
+        """
+
+        order_table = self.model._meta.db_table
+        order_media_table = OrderMedia._meta.db_table
+        medias_table = self.model.medias.through._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                WITH purchased AS (
+                    SELECT 1 FROM {order_medias}
+                    WHERE user_id = %(user)s AND media_id = %(media)s
+                        AND ordered
+                ), active_order AS (
+                    INSERT INTO {orders} (user_id, ordered, ordered_date,
+                                          start_date, refund_requested,
+                                          refund_granted)
+                    SELECT %(user)s, false, %(now)s, %(now)s, false, false
+                    WHERE NOT EXISTS (SELECT 1 FROM purchased)
+                    ON CONFLICT (user_id) WHERE NOT ordered
+                    DO UPDATE SET ordered = false
+                    RETURNING id
+                ), order_media AS (
+                    INSERT INTO {order_medias} (slug, media_id, user_id,
+                                                ordered)
+                    SELECT %(slug)s, %(media)s, %(user)s, false
+                    WHERE NOT EXISTS (SELECT 1 FROM purchased)
+                    ON CONFLICT (user_id, media_id) WHERE NOT ordered
+                    DO UPDATE SET ordered = false
+                    RETURNING id
+                ), added AS (
+                    INSERT INTO {medias} (order_id, ordermedia_id)
+                    SELECT active_order.id, order_media.id
+                    FROM active_order, order_media
+                    ON CONFLICT DO NOTHING
+                    RETURNING 1
+                )
+                SELECT EXISTS (SELECT 1 FROM purchased),
+                       EXISTS (SELECT 1 FROM added)
+            """.format(orders=order_table, order_medias=order_media_table,
+                       medias=medias_table), {
+                'user': user.pk,
+                'media': media.pk,
+                'now': timezone.now(),
+                'slug': slugify(token_urlsafe(32)),
+            })
+            purchased, added = cursor.fetchone()
+
+        if purchased:
+            return CartResult.PURCHASED
+        if not added:
+            return CartResult.IN_CART
+        # the statement sends no m2m_changed
+        invalidate_cart_count(user.pk)
+        return CartResult.ADDED
+
+    def with_medias(self, media_queryset=None):
+        """Load the coupon and the order medias with their media, so rendering
+        the cart and its total runs no query per item
+        """
+
+        if media_queryset is None:
+            order_medias = OrderMedia.objects.select_related('media')
+        else:
+            order_medias = OrderMedia.objects.prefetch_related(
+                Prefetch('media', queryset=media_queryset))
+        return self.select_related('coupon').prefetch_related(
+            Prefetch('medias', queryset=order_medias))
+
+
 class Order(models.Model):
     ref_code = models.CharField(max_length=120, blank=True, null=True)
     start_date = models.DateTimeField(auto_now_add=True)
@@ -58,18 +164,43 @@ class Order(models.Model):
         on_delete=models.CASCADE
     )
 
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'ordered'],
+                         name='order_user_ordered_idx'),
+        ]
+        constraints = [
+            # the active order is the cart, a user has one
+            models.UniqueConstraint(fields=['user'],
+                                    condition=Q(ordered=False),
+                                    name='order_one_active_per_user'),
+        ]
+
     def __str__(self):
         if self.user:
             return f"{ self.user.email }"
         return str(self.ordered_date)
 
     def get_total(self):
-        total = 0
-        for order_media in self.medias.all():
-            total += order_media.get_final_price()
-        if self.coupon:
-            total -= Decimal(self.coupon.amount)
-        return total
+        """Final price of the medias less the coupon. It is computed once per
+        order instance, from the prefetched medias or by one aggregate query.
+        """
+
+        if not hasattr(self, '_total'):
+            if 'medias' in getattr(self, '_prefetched_objects_cache', {}):
+                total = sum((order_media.get_final_price()
+                             for order_media in self.medias.all()),
+                            Decimal(0))
+            else:
+                total = self.medias.aggregate(total=Coalesce(
+                    Sum(FINAL_PRICE), Value(0), output_field=DecimalField()
+                ))['total']
+            if self.coupon:
+                total -= Decimal(self.coupon.amount)
+            self._total = total
+        return self._total
 
 
 class Address(models.Model):
@@ -149,3 +280,20 @@ def pre_save_receiver(sender, instance, *args, **kwargs):
 
 pre_save.connect(pre_save_receiver, sender=Address)
 pre_save.connect(pre_save_receiver, sender=OrderMedia)
+
+
+# the cart badge count changes with the medias of the active order and when it
+# is ordered
+def cart_count_receiver(sender, instance, *args, **kwargs):
+    invalidate_cart_count(instance.user_id)
+
+
+def cart_count_m2m_receiver(sender, instance, action, *args, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_cart_count(instance.user_id)
+
+
+post_save.connect(cart_count_receiver, sender=Order)
+post_delete.connect(cart_count_receiver, sender=Order)
+post_delete.connect(cart_count_receiver, sender=OrderMedia)
+m2m_changed.connect(cart_count_m2m_receiver, sender=Order.medias.through)
@@ -1,13 +1,9 @@
 from django import template
-from apps.ecommerce.models import Order
+from apps.ecommerce.cache import get_cart_count
 
 register = template.Library()
 
 
 @register.filter
 def cart_media_count(user):
-    if user.is_authenticated:
-        qs = Order.objects.filter(user=user, ordered=False)
-        if qs.exists():
-            return qs[0].medias.count()
-    return 0
+    return get_cart_count(user)
@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.ecommerce.models import CartResult, Order, OrderMedia
+from apps.media.models import Format, Language, Media
+
+THREADS = 8
+
+
+def create_medias(user, count):
+    media_format = Format.objects.create(name='Audiobook', sequence=1,
+                                         user=user)
+    language = Language.objects.create(name='Amharic', user=user)
+    return [
+        Media.objects.create(title='Media {}'.format(index), price=10,
+                             description='Sample media',
+                             media_format=media_format, language=language,
+                             user=user)
+        for index in range(count)
+    ]
+
+
+class AddToCartTest(TestCase):
+    """Test adding a media to the cart"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.media, = create_medias(self.user, 1)
+
+    def test_add_to_cart(self):
+        """Test the first add creates the order and the next one finds the
+        media in it
+        """
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Order.objects.add_to_cart(self.user, self.media),
+                             CartResult.ADDED)
+        self.assertEqual(Order.objects.add_to_cart(self.user, self.media),
+                         CartResult.IN_CART)
+
+        order = Order.objects.get(user=self.user, ordered=False)
+        self.assertEqual([order_media.media
+                          for order_media in order.medias.all()],
+                         [self.media])
+
+    def test_purchased_media(self):
+        """Test a purchased media isn't added again"""
+
+        Order.objects.add_to_cart(self.user, self.media)
+        Order.objects.filter(user=self.user).update(ordered=True)
+        OrderMedia.objects.filter(user=self.user).update(ordered=True)
+
+        self.assertEqual(Order.objects.add_to_cart(self.user, self.media),
+                         CartResult.PURCHASED)
+        self.assertFalse(
+            Order.objects.filter(user=self.user, ordered=False).exists())
+
+    def test_one_active_order(self):
+        """Test a user can't have a second active order"""
+
+        Order.objects.add_to_cart(self.user, self.media)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Order.objects.create(user=self.user, ordered_date=timezone.now())
+
+
+class ConcurrentAddToCartTest(TransactionTestCase):
+    """Test concurrent adds share one active order"""
+
+    # the flush truncates the tables of these apps only, with cascade
+    available_apps = ['django.contrib.auth', 'django.contrib.contenttypes',
+                      'rest_framework.authtoken', 'apps.account', 'apps.media',
+                      'apps.ecommerce']
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.medias = create_medias(self.user, THREADS)
+
+    def add_concurrently(self, medias):
+        barrier = Barrier(len(medias))
+
+        def add(media):
+            try:
+                barrier.wait()
+                return Order.objects.add_to_cart(self.user, media)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(len(medias)) as executor:
+            return list(executor.map(add, medias))
+
+    def test_same_media(self):
+        """Test the media is added once when it is added from many requests
+        at once
+        """
+
+        results = self.add_concurrently([self.medias[0]] * THREADS)
+
+        self.assertEqual(results.count(CartResult.ADDED), 1)
+        self.assertEqual(results.count(CartResult.IN_CART), THREADS - 1)
+        self.assertEqual(
+            Order.objects.filter(user=self.user, ordered=False).count(), 1)
+        self.assertEqual(
+            OrderMedia.objects.filter(user=self.user, ordered=False).count(),
+            1)
+
+    def test_different_medias(self):
+        """Test medias added at once end up in the same order"""
+
+        results = self.add_concurrently(self.medias)
+
+        self.assertEqual(results, [CartResult.ADDED] * THREADS)
+        order = Order.objects.get(user=self.user, ordered=False)
+        self.assertEqual({order_media.media_id
+                          for order_media in order.medias.all()},
+                         {media.pk for media in self.medias})
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.ecommerce.models import Order, OrderMedia
+from apps.media.models import Author, Format, Image, ImageSize, Language, \
+    Media, Track
+
+ORDER_URL = reverse('ecommerce-api:order-summary', kwargs={'version': 'v1'})
+
+
+class CartApiTest(TestCase):
+    """Test the cart renders compact medias unless asked to expand them"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        media_format = Format.objects.create(name='Audiobook', sequence=1,
+                                             user=self.user)
+        language = Language.objects.create(name='Amharic', user=self.user)
+        size = ImageSize.objects.create(name='Large', width=300,
+                                        watermark=False, user=self.user)
+
+        order = Order.objects.create(user=self.user,
+                                     ordered_date=timezone.now())
+        for index in range(20):
+            media = Media.objects.create(title='Media {}'.format(index),
+                                         price=10, description='Sample media',
+                                         media_format=media_format,
+                                         language=language, user=self.user)
+            media.authors.add(Author.objects.create(
+                name='Author {}'.format(index), sex='MALE', user=self.user))
+            media.images.add(Image.objects.create(
+                name='Cover', file='images/cover.png', size=size,
+                user=self.user))
+            media.tracks.add(Track.objects.create(
+                name='Track', popularity=1, duration=60, sequence=1,
+                user=self.user))
+            order.medias.add(OrderMedia.objects.create(media=media,
+                                                       user=self.user))
+
+    def test_cart_is_summarized(self):
+        """Test a 20 item cart is served in a handful of queries without the
+        tracks
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(queries), 6)
+        self.assertEqual(len(res.data['order_medias']), 20)
+
+        media = res.data['order_medias'][0]['media']
+        self.assertEqual(media['authors'], ['Author 0'])
+        self.assertEqual(media['media_format'], 'Audiobook')
+        self.assertEqual(len(media['images']), 1)
+        self.assertNotIn('tracks', media)
+
+    def test_expand_returns_full_media(self):
+        """Test ?expand=media renders the complete medias"""
+
+        res = self.client.get(ORDER_URL, {'expand': 'media'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        media = res.data['order_medias'][0]['media']
+        self.assertEqual(len(media['tracks']), 1)
+        self.assertIn('liked', media)
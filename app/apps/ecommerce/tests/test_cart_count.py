@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.ecommerce.cache import get_cart_count
+from apps.ecommerce.context_processors import cart
+from apps.ecommerce.models import Order, OrderMedia
+from apps.media.models import Format, Language, Media
+
+ADD_TO_CART_URL = reverse('ecommerce-api:add-to-cart',
+                          kwargs={'version': 'v1'})
+CART_COUNT_URL = reverse('ecommerce-api:cart-count', kwargs={'version': 'v1'})
+
+
+def remove_from_cart_url(slug):
+    return reverse('ecommerce-api:remove-from-cart',
+                   kwargs={'slug': slug, 'version': 'v1'})
+
+
+class CartCountTest(TestCase):
+    """Test the cart badge count is cached and follows the cart"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        media_format = Format.objects.create(name='Audiobook', sequence=1,
+                                             user=self.user)
+        language = Language.objects.create(name='Amharic', user=self.user)
+        self.medias = [
+            Media.objects.create(title='Media {}'.format(index), price=10,
+                                 description='Sample media',
+                                 media_format=media_format, language=language,
+                                 user=self.user)
+            for index in range(2)
+        ]
+
+    def add_to_cart(self, media):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(ADD_TO_CART_URL, {'slug': media.slug})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_count_is_cached(self):
+        """Test the count is read from the cache until the cart changes"""
+
+        self.add_to_cart(self.medias[0])
+        self.assertEqual(get_cart_count(self.user), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cart_count(self.user), 1)
+
+        self.add_to_cart(self.medias[1])
+        res = self.client.get(CART_COUNT_URL)
+        self.assertEqual(res.data, {'count': 2})
+
+    def test_removing_and_ordering_empty_the_badge(self):
+        """Test removing an item and checking out update the count"""
+
+        self.add_to_cart(self.medias[0])
+        self.add_to_cart(self.medias[1])
+        self.assertEqual(get_cart_count(self.user), 2)
+
+        order_media = OrderMedia.objects.get(media=self.medias[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(remove_from_cart_url(order_media.slug))
+        self.assertEqual(get_cart_count(self.user), 1)
+
+        order = Order.objects.get(user=self.user)
+        order.ordered = True
+        order.ordered_date = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        self.assertEqual(get_cart_count(self.user), 0)
+
+    def test_context_processor(self):
+        """Test templates get the count of the signed in user"""
+
+        self.add_to_cart(self.medias[0])
+        request = RequestFactory().get('/')
+        request.user = self.user
+
+        self.assertEqual(cart(request)['cart_media_count'](), 1)
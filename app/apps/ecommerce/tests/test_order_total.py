@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.ecommerce.models import Coupon, Order, OrderMedia
+from apps.media.models import Format, Language, Media
+
+ORDER_URL = reverse('ecommerce-api:order-summary', kwargs={'version': 'v1'})
+
+
+class OrderTotalTest(TestCase):
+    """Test order totals are computed by the database"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.media_format = Format.objects.create(name='Audiobook', sequence=1,
+                                                  user=self.user)
+        self.language = Language.objects.create(name='Amharic',
+                                                user=self.user)
+
+        self.order = Order.objects.create(user=self.user,
+                                          ordered_date=timezone.now())
+        for price, discount_price in (('10.00', None), ('20.00', '15.00'),
+                                      ('30.00', '0.00')):
+            self.add_media(price, discount_price)
+
+    def add_media(self, price, discount_price):
+        media = Media.objects.create(
+            title='Media', price=Decimal(price), user=self.user,
+            discount_price=Decimal(discount_price) if discount_price else None,
+            description='Sample media', media_format=self.media_format,
+            language=self.language, status=Media.StatusType.PUBLISHED)
+        self.order.medias.add(OrderMedia.objects.create(media=media,
+                                                        user=self.user))
+
+    def test_total_is_one_query(self):
+        """Test the total matches the item prices and is computed once"""
+
+        order = Order.objects.get(pk=self.order.pk)
+        expected = sum(order_media.get_final_price()
+                       for order_media in order.medias.all())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(order.get_total(), expected)
+            self.assertEqual(order.get_total(), Decimal('55.00'))
+
+    def test_coupon_is_subtracted(self):
+        """Test the coupon amount comes off the total"""
+
+        self.order.coupon = Coupon.objects.create(code='SAVE', amount=5,
+                                                  expiry_date=timezone.now())
+        self.order.save()
+
+        order = Order.objects.select_related('coupon').get(pk=self.order.pk)
+        self.assertEqual(order.get_total(), Decimal('50.00'))
+
+    def test_prefetched_cart_is_not_queried_again(self):
+        """Test the total of a cart loaded with its medias needs no query"""
+
+        order = Order.objects.with_medias().get(pk=self.order.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(order.get_total(), Decimal('55.00'))
+            self.assertEqual([order_media.get_final_price()
+                              for order_media in order.medias.all()],
+                             [Decimal('10.00'), Decimal('15.00'),
+                              Decimal('30.00')])
+
+    def test_cart_query_count_does_not_grow(self):
+        """Test the cart API loads its items in a fixed number of queries"""
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as three_items:
+            res = client.get(ORDER_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(str(res.data['total'])), Decimal('55.00'))
+
+        self.add_media('5.00', None)
+        with CaptureQueriesContext(connection) as four_items:
+            res = client.get(ORDER_URL)
+        self.assertEqual(len(res.data['order_medias']), 4)
+        self.assertEqual(len(four_items), len(three_items))
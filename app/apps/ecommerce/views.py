@@ -12,11 +12,10 @@ from django.utils import timezone
 
 from apps.media.models import Media
 from apps.ecommerce.models import Order, OrderMedia, Address, UserProfile, \
-                                Payment, Coupon, Refund
+                                Payment, Coupon, Refund, CartResult
 from apps.ecommerce.forms import CheckoutForm, CouponForm, PaymentForm, RefundForm
 
-from apps.common.utils.check import is_item_already_purchased, \
-    is_coupon_used_by_current_user
+from apps.common.utils.check import is_coupon_used_by_current_user
 
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
@@ -38,7 +37,8 @@ class MediaDetailView(DetailView):
 class OrderSummaryView(LoginRequiredMixin, View):
     def get(self, *args, **kwargs):
         try:
-            order = Order.objects.get(user=self.request.user, ordered=False)
+            order = Order.objects.with_medias().get(user=self.request.user,
+                                                    ordered=False)
             context = {
                 'object': order
             }
@@ -50,35 +50,16 @@ class OrderSummaryView(LoginRequiredMixin, View):
 
 @login_required
 def add_to_cart(request, slug):
-    media = get_object_or_404(Media, slug=slug)
+    media = get_object_or_404(Media.objects.only('pk'), slug=slug)
 
-    if is_item_already_purchased(request, media):
+    result = Order.objects.add_to_cart(request.user, media)
+    if result == CartResult.PURCHASED:
         messages.info(request, "You already purchased this item.")
-        return redirect("ecommerce:order-summary")
-
-    order_media, created = OrderMedia.objects.get_or_create(
-        media=media,
-        user=request.user,
-        ordered=False
-    )
-    order_qs = Order.objects.filter(user=request.user, ordered=False)
-    if order_qs.exists():
-        order = order_qs[0]
-        # check if the order media is in the order
-        if order.medias.filter(media__slug=media.slug).exists():
-            messages.info(request, "This item is in the cart.")
-            return redirect("ecommerce:order-summary")
-        else:
-            order.medias.add(order_media)
-            messages.info(request, "This item was added to your cart.")
-            return redirect("ecommerce:order-summary")
+    elif result == CartResult.IN_CART:
+        messages.info(request, "This item is in the cart.")
     else:
-        ordered_date = timezone.now()
-        order = Order.objects.create(
-            user=request.user, ordered_date=ordered_date)
-        order.medias.add(order_media)
         messages.info(request, "This item was added to your cart.")
-        return redirect("ecommerce:order-summary")
+    return redirect("ecommerce:order-summary")
 
 
 @login_required
@@ -120,7 +101,8 @@ def is_valid_form(values):
 class CheckoutView(View):
     def get(self, *args, **kwargs):
         try:
-            order = Order.objects.get(user=self.request.user, ordered=False)
+            order = Order.objects.with_medias().get(user=self.request.user,
+                                                    ordered=False)
             form = CheckoutForm()
             context = {
                 'form': form,
@@ -219,7 +201,8 @@ class CheckoutView(View):
 
 class PaymentView(View):
     def get(self, *args, **kwargs):
-        order = Order.objects.get(user=self.request.user, ordered=False)
+        order = Order.objects.with_medias().get(user=self.request.user,
+                                                ordered=False)
         if order.billing_address:
             context = {
                 'order': order,
@@ -247,7 +230,8 @@ class PaymentView(View):
             return redirect("ecommerce:checkout")
 
     def post(self, *args, **kwargs):
-        order = Order.objects.get(user=self.request.user, ordered=False)
+        order = Order.objects.select_related('coupon').get(
+            user=self.request.user, ordered=False)
         form = PaymentForm(self.request.POST)
         userprofile = UserProfile.objects.get(user=self.request.user)
         if form.is_valid():
@@ -0,0 +1,61 @@
+import time
+
+from django.core.cache import cache
+
+# user independent part of the /home response
+HOME_CACHE_KEY = 'media:home'
+HOME_CACHE_TIMEOUT = 60 * 5
+
+# /suggest results by normalized search text, short lived since titles and
+# names can change without invalidating them
+SUGGEST_CACHE_KEY = 'media:suggest:{}:{}'
+SUGGEST_CACHE_TIMEOUT = 60 * 5
+
+# /searchby facets, shared by all workers and tagged with a version that
+# the Language, Format and Genre signals bump
+SEARCHBY_VERSION_KEY = 'media:searchby:version'
+SEARCHBY_CACHE_KEY = 'media:searchby:{}'
+SEARCHBY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# facets of the latest version seen by this process
+_local_searchby = {'version': None, 'data': None}
+
+
+def invalidate_home_cache():
+    cache.delete(HOME_CACHE_KEY)
+
+
+def _new_version():
+    # time based, so a version evicted from the shared cache is never reused
+    return int(time.time() * 1000)
+
+
+def get_searchby_version():
+    version = cache.get(SEARCHBY_VERSION_KEY)
+    if version is None:
+        cache.add(SEARCHBY_VERSION_KEY, _new_version(), None)
+        version = cache.get(SEARCHBY_VERSION_KEY)
+    return version
+
+
+def bump_searchby_version():
+    try:
+        cache.incr(SEARCHBY_VERSION_KEY)
+    except ValueError:
+        cache.set(SEARCHBY_VERSION_KEY, _new_version(), None)
+
+
+def get_searchby(version, build):
+    """Return the facets of the given version, calling build() on a miss"""
+
+    if _local_searchby['version'] == version:
+        return _local_searchby['data']
+
+    key = SEARCHBY_CACHE_KEY.format(version)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, SEARCHBY_CACHE_TIMEOUT)
+
+    _local_searchby.update(version=version, data=data)
+    return data
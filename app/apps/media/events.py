@@ -0,0 +1,71 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from apps.media.models import TrackDownloadEvent
+
+_lock = threading.Lock()
+_pending = []
+_timer = None
+
+
+def log_track_download(track_id, user_id, status):
+    """Queue a download event of the track history. The queue of the process
+    is written with one INSERT once it is full, or by a timer
+    TRACK_DOWNLOAD_EVENT_FLUSH_SECONDS after its first event, so an idle
+    process doesn't hold events.
+    """
+
+    global _timer
+
+    with _lock:
+        _pending.append(TrackDownloadEvent(
+            track_id=track_id, user_id=user_id, status=status,
+            created_at=timezone.now()))
+        full = len(_pending) >= settings.TRACK_DOWNLOAD_EVENT_BATCH_SIZE
+        if not full and _timer is None:
+            _timer = threading.Timer(
+                settings.TRACK_DOWNLOAD_EVENT_FLUSH_SECONDS, _flush_on_timer)
+            _timer.daemon = True
+            _timer.start()
+
+    if full:
+        flush_track_download_events()
+
+
+def _flush_on_timer():
+    try:
+        flush_track_download_events()
+    finally:
+        # the connections of the timer thread
+        connections.close_all()
+
+
+def flush_track_download_events():
+    """Write the queued download events"""
+
+    global _timer
+
+    with _lock:
+        events = _pending[:]
+        _pending.clear()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+
+    if events:
+        try:
+            TrackDownloadEvent.objects.bulk_create(events)
+        except Exception as ex:
+            # the history is best effort, the current status is in
+            # TrackDownload
+            logging.error("Unable to write {} track download events".format(
+                len(events)))
+            logging.error(ex)
+
+
+atexit.register(flush_track_download_events)
@@ -0,0 +1,51 @@
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+
+from apps.media.models import TrackDownload, TrackDownloadEvent
+
+
+class Command(BaseCommand):
+    """Django command to start the track download history from the current
+    TrackDownload rows. Each user and track without any event gets one event
+    with its current status.
+    """
+
+    help = 'Backfill the track download events from the current download ' \
+           'status'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of download rows read per statement')
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        sql = """
+            INSERT INTO {events} (track_id, user_id, status, created_at)
+            SELECT download.track_id, download.user_id, download.status,
+                   download.updated_at
+            FROM {downloads} AS download
+            WHERE download.id BETWEEN %s AND %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM {events} AS event
+                  WHERE event.track_id = download.track_id
+                    AND event.user_id = download.user_id
+              )
+        """.format(events=TrackDownloadEvent._meta.db_table,
+                   downloads=TrackDownload._meta.db_table)
+
+        last_id = 0
+        inserted = 0
+        while True:
+            ids = list(TrackDownload.objects.filter(pk__gt=last_id)
+                       .order_by('pk').values_list('pk', flat=True)
+                       [:batch_size])
+            if not ids:
+                break
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, [ids[0], ids[-1]])
+                inserted += cursor.rowcount
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(
+            'Backfilled {} track download events'.format(inserted)))
@@ -0,0 +1,91 @@
+import time
+from io import BytesIO
+from tempfile import TemporaryFile
+from PIL import Image
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+
+from apps.common.utils.file_processor import get_base_size, get_logo, \
+    get_watermark_size, get_watermark_top_left, resize_and_watermark
+
+
+def resize_before(base_img, width, logo_max_width_height_ratio,
+                  logo_top_left_ratio):
+    """What resize_image did before: decode the logo, composite at full
+    size, resize, encode to a temporary file
+    """
+
+    transparent = Image.new('RGBA', base_img.size, (0, 0, 0, 0))
+    transparent.paste(base_img, (0, 0))
+
+    with staticfiles_storage.open('img/logo.png') as logo_file:
+        watermark_img = Image.open(logo_file).convert("RGBA")
+    watermark_img = watermark_img.resize(
+        get_watermark_size(base_img, logo_max_width_height_ratio))
+    transparent.paste(watermark_img,
+                      get_watermark_top_left(base_img, logo_top_left_ratio),
+                      mask=watermark_img)
+
+    transparent = transparent.resize(get_base_size(base_img, width))
+
+    f = TemporaryFile()
+    transparent.save(f, 'PNG')
+    f.seek(0)
+    length = len(f.read())
+    f.close()
+    return length
+
+
+def resize_after(base_img, width, logo_max_width_height_ratio,
+                 logo_top_left_ratio):
+    resized = resize_and_watermark(base_img, width, True,
+                                   logo_max_width_height_ratio,
+                                   logo_top_left_ratio)
+
+    f = BytesIO()
+    resized.save(f, 'PNG')
+    return f.tell()
+
+
+class Command(BaseCommand):
+    """Django command to compare the image resizing pipelines on synthetic
+    images. The watermark logo is read from the static storage like the
+    resize_image task does.
+    """
+
+    help = 'Benchmark watermarking and resizing of generated images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+',
+                            default=['800x600', '2000x1500', '4000x3000'],
+                            help='Generated image sizes as WIDTHxHEIGHT')
+        parser.add_argument('--width', type=int, default=300,
+                            help='Width the images are resized to')
+        parser.add_argument('--repeat', type=int, default=10,
+                            help='Number of timed runs per image size')
+
+    def handle(self, *args, **kwargs):
+        # warm the logo cache like a worker that already resized an image
+        get_logo()
+
+        for size in kwargs['sizes']:
+            width, height = (int(value) for value in size.split('x'))
+            base_img = Image.effect_noise((width, height), 64).convert("RGBA")
+
+            for name, pipeline in (('before', resize_before),
+                                   ('after', resize_after)):
+                self.report(size, name, pipeline, base_img, kwargs['width'],
+                            kwargs['repeat'])
+
+    def report(self, size, name, pipeline, base_img, width, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            pipeline(base_img, width, 0.06, 0.02)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        self.stdout.write(
+            '{:<12} {:<8} median {:8.2f}ms  max {:8.2f}ms'.format(
+                size, name, timings[len(timings) // 2], timings[-1]))
@@ -0,0 +1,103 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.core.management.base import BaseCommand
+
+from apps.media.models import Media, Author, Format, Language, \
+    update_search_vector
+from apps.media.search import search_medias
+
+WORDS = ('sun', 'river', 'night', 'story', 'king', 'love', 'road', 'city',
+         'song', 'dream', 'stone', 'fire', 'light', 'rain', 'garden', 'winter',
+         'house', 'letter', 'ocean', 'voice')
+
+
+class Command(BaseCommand):
+    """Django command to compare SearchFilter and full text search on a
+    generated catalog. Everything it creates is rolled back at the end.
+    """
+
+    help = 'Benchmark the media search paths on a generated catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000,
+                            help='Number of medias to generate')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Number of timed runs per search term')
+        parser.add_argument('--terms', nargs='+',
+                            default=['river', 'winter song', 'author 42'])
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            self.populate(kwargs['count'])
+
+            published = Media.objects.filter(status=Media.StatusType.PUBLISHED)
+            for term in kwargs['terms']:
+                # what SearchFilter(search_fields=['title', 'authors__name'])
+                # builds
+                search_filter = published
+                for word in term.split():
+                    search_filter = search_filter.filter(
+                        Q(title__icontains=word) |
+                        Q(authors__name__icontains=word))
+                search_filter = search_filter.distinct()
+
+                self.report(term, 'SearchFilter', search_filter,
+                            kwargs['repeat'])
+                self.report(term, 'full text', search_medias(published, term),
+                            kwargs['repeat'])
+
+            transaction.set_rollback(True)
+
+    def populate(self, count):
+        self.stdout.write('Generating {} medias...'.format(count))
+        user = get_user_model().objects.create_user('+251900000000', token())
+        media_format = Format.objects.create(name='Benchmark', sequence=0,
+                                             user=user)
+        language = Language.objects.create(name='Benchmark', user=user)
+
+        authors = Author.objects.bulk_create([
+            Author(name='Author {}'.format(i), slug=token(), sex='UNSURE',
+                   user=user)
+            for i in range(max(count // 100, 1))
+        ])
+        medias = Media.objects.bulk_create([
+            Media(title=' '.join(random.sample(WORDS, 3)),
+                  description=' '.join(random.choices(WORDS, k=30)),
+                  price=10, slug=token(), status=Media.StatusType.PUBLISHED,
+                  media_format=media_format, language=language, user=user)
+            for _ in range(count)
+        ], batch_size=5000)
+        Media.authors.through.objects.bulk_create([
+            Media.authors.through(media_id=media.pk,
+                                  author_id=random.choice(authors).pk)
+            for media in medias
+        ], batch_size=5000)
+
+        # bulk_create does not send signals
+        update_search_vector(
+            Media.objects.filter(media_format=media_format).values('pk'))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'ANALYZE media_media, media_author, media_media_authors')
+
+    def report(self, term, name, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            # what a paginated list request runs
+            queryset.count()
+            list(queryset[:10])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        self.stdout.write(
+            '{:<14} {:<12} median {:8.2f}ms  max {:8.2f}ms'.format(
+                term, name, timings[len(timings) // 2], timings[-1]))
+
+
+def token():
+    return '{:032x}'.format(random.getrandbits(128))
@@ -0,0 +1,67 @@
+import datetime
+
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.media.models import TrackDownloadEvent
+
+
+class Command(BaseCommand):
+    """Django command to create the monthly partitions of the track download
+    history. Run it at least once a month, e.g. from cron, so events don't
+    pile up in the default partition.
+    """
+
+    help = 'Create the monthly partitions of the track download events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=3,
+                            help='Number of months to create starting from '
+                                 'the current one')
+
+    def handle(self, *args, **kwargs):
+        table = TrackDownloadEvent._meta.db_table
+        start = timezone.now().date().replace(day=1)
+
+        created = 0
+        for _ in range(kwargs['months']):
+            end = (start + datetime.timedelta(days=32)).replace(day=1)
+            if self.create_partition(table, start, end):
+                created += 1
+            start = end
+
+        self.stdout.write(self.style.SUCCESS(
+            'Created {} partitions of {}'.format(created, table)))
+
+    def create_partition(self, table, start, end):
+        partition = '{}_y{}m{:02d}'.format(table, start.year, start.month)
+        default = '{}_default'.format(table)
+
+        create = 'CREATE TABLE {} PARTITION OF {} FOR VALUES FROM (%s) TO (%s)'
+        in_month = 'created_at >= %s AND created_at < %s'
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s)', [partition])
+            if cursor.fetchone()[0] is not None:
+                return False
+
+            cursor.execute('SELECT EXISTS (SELECT 1 FROM {} WHERE {})'
+                           .format(default, in_month), [start, end])
+            if not cursor.fetchone()[0]:
+                cursor.execute(create.format(partition, table), [start, end])
+                return True
+
+            # events of the month already landed in the default partition,
+            # move them to the new one
+            cursor.execute('ALTER TABLE {} DETACH PARTITION {}'
+                           .format(table, default))
+            cursor.execute(create.format(partition, table), [start, end])
+            cursor.execute('INSERT INTO {} SELECT * FROM {} WHERE {}'
+                           .format(partition, default, in_month),
+                           [start, end])
+            cursor.execute('DELETE FROM {} WHERE {}'.format(default, in_month),
+                           [start, end])
+            cursor.execute('ALTER TABLE {} ATTACH PARTITION {} DEFAULT'
+                           .format(table, default))
+        return True
@@ -0,0 +1,85 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.media.models import Blob, Image, ImageRendition, Track, \
+    TrackRendition
+
+
+class Command(BaseCommand):
+    """Django command to remove the stored image and track files and rendition
+    directories no row refers to. Recently released files are kept, an upload
+    may still be pointing a row at them.
+    """
+
+    help = 'Delete the stored files of images and tracks that are no longer ' \
+           'referenced'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=24,
+                            help='Hours a file has to be unreferenced before '
+                                 'it is deleted')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List the files without deleting them')
+
+    def rendition_dirs(self):
+        """Directories of the rendition blobs and the model of their rows"""
+
+        return (
+            (os.path.join(settings.IMAGE_DIR, 'renditions', ''),
+             ImageRendition),
+            (os.path.join(settings.TRACK_FILE_DIR, 'renditions', ''),
+             TrackRendition),
+        )
+
+    def is_referenced(self, name):
+        """Whether a row refers to the blob, the count is only kept by saves"""
+
+        for prefix, model in self.rendition_dirs():
+            if name.startswith(prefix):
+                return model.objects.filter(
+                    source_hash=name[len(prefix):]).exists()
+
+        return Image.objects.filter(file=name).exists() or \
+            Track.objects.filter(file_url=name).exists()
+
+    def delete_tree(self, path):
+        directories, files = default_storage.listdir(path)
+        for directory in directories:
+            self.delete_tree(os.path.join(path, directory))
+        for filename in files:
+            default_storage.delete(os.path.join(path, filename))
+
+    def handle(self, *args, **kwargs):
+        released_before = timezone.now() - timedelta(hours=kwargs['min_age'])
+        names = Blob.objects.filter(
+            ref_count=0, updated_at__lt=released_before
+        ).values_list('name', flat=True)
+
+        deleted = 0
+        for name in names.iterator():
+            with transaction.atomic():
+                # locked against saves counting a new reference meanwhile
+                blob = Blob.objects.select_for_update() \
+                    .filter(name=name, ref_count=0).first()
+                if blob is None or self.is_referenced(name):
+                    continue
+
+                if kwargs['dry_run']:
+                    self.stdout.write(name)
+                else:
+                    if name.startswith(tuple(
+                            prefix for prefix, _ in self.rendition_dirs())):
+                        self.delete_tree(name)
+                    else:
+                        default_storage.delete(name)
+                    blob.delete()
+                deleted += 1
+
+        self.stdout.write(self.style.SUCCESS('{} {} unreferenced files'.format(
+            'Found' if kwargs['dry_run'] else 'Deleted', deleted)))
@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db import connection
+from django.core.management.base import BaseCommand
+
+from apps.media.models import Media, Track, update_estimated_length
+from apps.media.tasks.probe_track_task import probe_track_file
+
+
+class Command(BaseCommand):
+    """Django command to read the duration, bitrate, codec and sample rate of
+    the track files. Tracks are probed in parallel, ffprobe spends its time
+    waiting on the storage.
+    """
+
+    help = 'Read the audio metadata of the track files and update the media ' \
+           'lengths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Number of tracks probed at the same time')
+        parser.add_argument('--missing-only', action='store_true',
+                            help='Only probe tracks that were never probed')
+
+    def probe_in_thread(self, track):
+        try:
+            probe_track_file(track)
+            return None
+        except Exception as ex:
+            return ex
+        finally:
+            # every thread opens its own database connection
+            connection.close()
+
+    def probe_all(self, tracks):
+        probed = 0
+        for track in tracks.iterator():
+            try:
+                probe_track_file(track)
+                probed += 1
+            except Exception as ex:
+                self.stderr.write('Unable to probe track {}: {}'.format(
+                    track.slug, ex))
+        return probed
+
+    def probe_parallel(self, tracks, workers):
+        probed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.probe_in_thread, track): track
+                       for track in tracks.iterator()}
+            for future in as_completed(futures):
+                error = future.result()
+                if error is None:
+                    probed += 1
+                else:
+                    self.stderr.write('Unable to probe track {}: {}'.format(
+                        futures[future].slug, error))
+        return probed
+
+    def handle(self, *args, **kwargs):
+        tracks = Track.objects.exclude(file_url__isnull=True) \
+            .exclude(file_url='').only('pk', 'slug', 'file_url')
+        if kwargs['missing_only']:
+            tracks = tracks.filter(codec='')
+
+        if kwargs['workers'] <= 1:
+            probed = self.probe_all(tracks)
+        else:
+            probed = self.probe_parallel(tracks, kwargs['workers'])
+
+        # medias without probed tracks still get the sum of the entered
+        # durations, medias without tracks keep their entered length
+        update_estimated_length(
+            Media.objects.filter(tracks__isnull=False).values('pk'))
+        self.stdout.write(self.style.SUCCESS(
+            'Probed {} tracks'.format(probed)))
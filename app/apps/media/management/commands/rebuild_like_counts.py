@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.core.management.base import BaseCommand
+
+from apps.media.models import Media, MediaLike
+
+
+class Command(BaseCommand):
+    """Django command to recompute Media.like_count from MediaLike rows"""
+
+    help = 'Rebuild the denormalized like counters of all media'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of media updated per statement')
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        likes = MediaLike.objects.filter(media=OuterRef('pk'), liked=True) \
+            .order_by().values('media').annotate(total=Count('pk')) \
+            .values('total')
+
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(Media.objects.filter(pk__gt=last_id).order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+
+            # one UPDATE ... SET like_count = (SELECT COUNT(*) ...) per batch
+            with transaction.atomic():
+                updated += Media.objects \
+                    .filter(pk__gte=ids[0], pk__lte=ids[-1]) \
+                    .update(like_count=Coalesce(Subquery(likes), 0))
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(
+            'Rebuilt like counts of {} media'.format(updated)))
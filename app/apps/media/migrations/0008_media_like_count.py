@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:39
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_like_count(apps, schema_editor):
+    Media = apps.get_model('media', 'Media')
+    MediaLike = apps.get_model('media', 'MediaLike')
+
+    likes = MediaLike.objects.filter(media=OuterRef('pk'), liked=True) \
+        .order_by().values('media').annotate(total=Count('pk')).values('total')
+    Media.objects.update(like_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0007_remove_media_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_like_count, migrations.RunPython.noop),
+    ]
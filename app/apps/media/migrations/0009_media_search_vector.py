@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:42
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# same weights as apps.media.search.media_search_vector
+POPULATE_SEARCH_VECTOR = """
+UPDATE media_media m SET search_vector =
+    setweight(to_tsvector('simple', coalesce(m.title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce((
+        SELECT string_agg(a.name, ' ') FROM media_author a
+        JOIN media_media_authors ma ON ma.author_id = a.id WHERE ma.media_id = m.id
+    ), '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce((
+        SELECT string_agg(n.name, ' ') FROM media_narrator n
+        JOIN media_media_narrators mn ON mn.narrator_id = n.id WHERE mn.media_id = m.id
+    ), '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(m.description, '')), 'C');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0008_media_like_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='media_search_vector_idx'),
+        ),
+        migrations.RunSQL(POPULATE_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:44
+
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0009_media_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='author',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='author_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='media_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='narrator',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='narrator_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:47
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # build the indexes without locking the tables against writes
+    atomic = False
+
+    dependencies = [
+        ('media', '0010_trigram_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='media',
+            index=models.Index(condition=models.Q(('status', 'PUBLISHED')), fields=['featured', '-created_at'], name='media_published_featured_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='media',
+            index=models.Index(condition=models.Q(('status', 'PUBLISHED')), fields=['media_format', '-created_at'], name='media_published_format_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='medialike',
+            index=models.Index(fields=['media', 'liked'], name='medialike_media_liked_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='track',
+            index=models.Index(fields=['-sequence', '-id'], name='track_sequence_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# keep the most recently updated like of each user and media
+DEDUPE_LIKES_SQL = '''
+DELETE FROM media_medialike AS duplicate
+USING media_medialike AS kept
+WHERE duplicate.media_id = kept.media_id
+  AND duplicate.user_id = kept.user_id
+  AND (duplicate.updated_at, duplicate.id) < (kept.updated_at, kept.id);
+'''
+
+# keep the latest download status of each user and track, like Track.is_downloaded read it
+DEDUPE_DOWNLOADS_SQL = '''
+DELETE FROM media_trackdownload AS duplicate
+USING media_trackdownload AS kept
+WHERE duplicate.track_id = kept.track_id
+  AND duplicate.user_id = kept.user_id
+  AND (duplicate.created_at, duplicate.id) < (kept.created_at, kept.id);
+'''
+
+
+def recount_likes(apps, schema_editor):
+    Media = apps.get_model('media', 'Media')
+    MediaLike = apps.get_model('media', 'MediaLike')
+
+    likes = MediaLike.objects.filter(media=OuterRef('pk'), liked=True) \
+        .order_by().values('media').annotate(total=Count('pk')).values('total')
+    Media.objects.update(like_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0011_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DEDUPE_LIKES_SQL, migrations.RunSQL.noop),
+        migrations.RunSQL(DEDUPE_DOWNLOADS_SQL, migrations.RunSQL.noop),
+        # duplicated likes were counted more than once
+        migrations.RunPython(recount_likes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='medialike',
+            constraint=models.UniqueConstraint(fields=('media', 'user'), name='medialike_media_user_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='trackdownload',
+            constraint=models.UniqueConstraint(fields=('track', 'user'), name='trackdownload_track_user_unique'),
+        ),
+    ]
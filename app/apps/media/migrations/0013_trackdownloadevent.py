@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+# Django can't create partitioned tables, the primary key has to include the partition key.
+# Rows outside of the monthly partitions land in the default partition.
+CREATE_EVENTS_SQL = '''
+CREATE TABLE media_trackdownloadevent (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    track_id bigint NOT NULL REFERENCES media_track (id) DEFERRABLE INITIALLY DEFERRED,
+    user_id bigint NOT NULL REFERENCES account_user (id) DEFERRABLE INITIALLY DEFERRED,
+    status varchar(15) NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE media_trackdownloadevent_default PARTITION OF media_trackdownloadevent DEFAULT;
+CREATE INDEX media_trackdownloadevent_track_id_idx ON media_trackdownloadevent (track_id);
+CREATE INDEX media_trackdownloadevent_user_id_idx ON media_trackdownloadevent (user_id);
+'''
+
+DROP_EVENTS_SQL = 'DROP TABLE media_trackdownloadevent;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('media', '0012_unique_like_and_download'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(CREATE_EVENTS_SQL, DROP_EVENTS_SQL),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='TrackDownloadEvent',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('status', models.CharField(choices=[('DOWNLOADED', 'Downloaded'), ('REMOVED', 'Removed')], max_length=15)),
+                        ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                        ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='media.track')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL)),
+                    ],
+                ),
+            ],
+        ),
+    ]
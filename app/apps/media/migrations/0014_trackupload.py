@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('media', '0013_trackdownloadevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('slug', models.SlugField(blank=True, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('upload_id', models.CharField(max_length=1024)),
+                ('parts', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('UPLOADING', 'Uploading'), ('COMPLETED', 'Completed')], default='UPLOADING', max_length=15)),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='media.track')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0014_trackupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('format', models.CharField(choices=[('MP3', 'Mp3'), ('HLS', 'Hls')], max_length=15)),
+                ('bitrate', models.PositiveIntegerField(null=True)),
+                ('file', models.FileField(max_length=255, upload_to='')),
+                ('source_hash', models.CharField(max_length=64)),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='media.track')),
+            ],
+            options={
+                'ordering': ['format', 'bitrate'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0015_trackrendition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='codec',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0016_track_audio_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('format', models.CharField(choices=[('PNG', 'Png'), ('WEBP', 'Webp'), ('AVIF', 'Avif')], max_length=15)),
+                ('width', models.PositiveIntegerField()),
+                ('file', models.FileField(max_length=255, upload_to='')),
+                ('source_hash', models.CharField(max_length=64)),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='media.image')),
+            ],
+            options={
+                'ordering': ['-width', 'format'],
+            },
+        ),
+    ]
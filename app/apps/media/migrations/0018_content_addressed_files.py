@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:13
+
+import apps.common.utils.fields
+import apps.common.utils.validators
+from django.db import migrations, models
+
+# every existing file starts with the rows referring to it
+COUNT_REFERENCES_SQL = '''
+INSERT INTO media_blob (name, ref_count, created_at, updated_at)
+SELECT name, count(*), now(), now()
+FROM (
+    SELECT file AS name FROM media_image WHERE file <> ''
+    UNION ALL
+    SELECT file_url FROM media_track WHERE file_url <> ''
+) AS files
+GROUP BY name;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0017_image_rendition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='file',
+            field=apps.common.utils.fields.ContentAddressedImageField(null=True, upload_to='images', validators=[apps.common.utils.validators.validate_image_size]),
+        ),
+        migrations.AlterField(
+            model_name='track',
+            name='file_url',
+            field=apps.common.utils.fields.ContentAddressedFileField(null=True, upload_to='audio', validators=[apps.common.utils.validators.validate_file_type]),
+        ),
+        migrations.RunSQL(COUNT_REFERENCES_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:37
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0018_content_addressed_files'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='author',
+            name='author_name_trgm_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='media',
+            name='media_title_trgm_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='narrator',
+            name='narrator_name_trgm_idx',
+        ),
+        migrations.AddIndex(
+            model_name='author',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='author_name_upper_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='media_title_upper_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='narrator',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='narrator_name_upper_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+import os
+
+from django.conf import settings
+from django.db import migrations
+
+# every rendition directory starts with the renditions made into it
+COUNT_RENDITIONS_SQL = '''
+INSERT INTO media_blob (name, ref_count, created_at, updated_at)
+SELECT %s || source_hash, count(*), now(), now()
+FROM {table}
+GROUP BY source_hash
+ON CONFLICT (name) DO UPDATE SET ref_count = EXCLUDED.ref_count;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0019_suggest_upper_trgm_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL([
+            (COUNT_RENDITIONS_SQL.format(table='media_imagerendition'),
+             [os.path.join(settings.IMAGE_DIR, 'renditions', '')]),
+            (COUNT_RENDITIONS_SQL.format(table='media_trackrendition'),
+             [os.path.join(settings.TRACK_FILE_DIR, 'renditions', '')]),
+        ], migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0020_rendition_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trackupload',
+            name='sha256_state',
+            field=models.BinaryField(default=b''),
+        ),
+    ]
@@ -1,21 +1,38 @@
 import os
+from collections import Counter
 from secrets import token_urlsafe
 from enum import Enum
 import random
 
-from django.db import models
+from django.db import connection, models, transaction
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import Exists, F, OuterRef, Prefetch, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Upper
 from django.conf import settings
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete, \
+    m2m_changed
 from django.utils.translation import ugettext_lazy as _
 from django.utils.text import slugify
+from django.utils import timezone
 from django.shortcuts import reverse
 from django.dispatch import receiver
 
 from ..common.models import TimeStampedModel
-from apps.media.tasks.resize_image_task import resize_image
+from apps.media.cache import invalidate_home_cache, bump_searchby_version
+from apps.media.search import media_search_vector
+from apps.media.tasks.render_image_task import render_image
+from apps.media.tasks.encode_track_task import encode_track
+from apps.media.tasks.probe_track_task import probe_track
 from apps.common.utils.validators import validate_image_size, validate_file_type
+from apps.common.utils.fields import ContentAddressedFileField, \
+    ContentAddressedImageField
+from apps.common.utils.renditions import \
+    rendition_dir as source_rendition_dir
 
 
+# image_file_path and track_file_path name the files of older rows, their
+# migrations refer to them
 def image_file_path(instance, filename):
     """Generate file path for new media cover image"""
 
@@ -86,10 +103,24 @@ class ImageSize(TimeStampedModel):
         return str(self.name)
 
 
+class Blob(TimeStampedModel):
+    """Stored image or track file, shared by the rows that uploaded the same
+    bytes, or the directory of the renditions made from such a file. Files
+    nothing refers to are removed by the delete_unreferenced_blobs command.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+
 class Image(TimeStampedModel):
     name = models.CharField(max_length=100)
     slug = models.SlugField(blank=True, unique=True)
-    file = models.ImageField(null=True, upload_to=image_file_path, validators=[validate_image_size])
+    file = ContentAddressedImageField(null=True, upload_to=settings.IMAGE_DIR,
+                                      validators=[validate_image_size])
     size = models.ForeignKey(
         ImageSize,
         on_delete=models.PROTECT
@@ -103,6 +134,39 @@ class Image(TimeStampedModel):
         return "{} - ({})".format(self.name, self.size)
 
 
+class ImageRendition(TimeStampedModel):
+    """Resized and re-encoded version of an image, made by the render_image
+    task for every ImageSize
+    """
+
+    image = models.ForeignKey(
+        'image',
+        related_name='renditions',
+        on_delete=models.CASCADE
+    )
+
+    # Format
+    class FormatType(models.TextChoices):
+        PNG = "PNG"
+        WEBP = "WEBP"
+        AVIF = "AVIF"
+
+    format = models.CharField(
+        max_length=15,
+        choices=FormatType.choices
+    )
+    width = models.PositiveIntegerField()
+    file = models.FileField(max_length=255)
+    # sha256 of the source image the rendition was made from
+    source_hash = models.CharField(max_length=64)
+
+    class Meta:
+        ordering = ['-width', 'format']
+
+    def __str__(self):
+        return "{} - {} w{}".format(self.image_id, self.format, self.width)
+
+
 class Language(TimeStampedModel):
     name = models.CharField(max_length=50)
     slug = models.SlugField(blank=True, unique=True)
@@ -143,6 +207,10 @@ class Author(TimeStampedModel):
 
     class Meta:
         ordering = ['-name']
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'),
+                     name='author_name_upper_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -170,11 +238,172 @@ class Narrator(TimeStampedModel):
 
     class Meta:
         ordering = ['-name']
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'),
+                     name='narrator_name_upper_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class MediaQuerySet(models.QuerySet):
+    """Query helpers for the media API"""
+
+    def with_likes(self, user=None):
+        """Annotate whether the given user liked each media"""
+
+        if user is not None and user.is_authenticated:
+            return self.annotate(liked_by_user=Exists(
+                MediaLike.objects.filter(media=OuterRef('pk'), user=user,
+                                         liked=True)
+            ))
+        return self
+
+    def for_summary(self):
+        """Load everything MediaSummarySerializer renders in a fixed number of
+        queries
+        """
+
+        images = Image.objects.select_related('size') \
+            .prefetch_related('renditions')
+        return self.select_related('media_format').prefetch_related(
+            'authors', Prefetch('images', queryset=images))
+
+    def for_display(self, user=None):
+        """Load everything MediaSerializer renders in a fixed number of
+        queries
+        """
+
+        images = Image.objects.select_related('size') \
+            .prefetch_related('renditions')
+        tracks = Track.objects.with_download_status(user) \
+            .prefetch_related('renditions').order_by('sequence')
+
+        return self.with_likes(user).select_related(
+            'language', 'media_format'
+        ).prefetch_related(
+            'genres',
+            'narrators',
+            Prefetch('images', queryset=images),
+            Prefetch('authors', queryset=Author.objects.prefetch_related(
+                Prefetch('images', queryset=images)
+            )),
+            Prefetch('tracks', queryset=tracks, to_attr='ordered_tracks'),
+        )
+
+
+class TrackQuerySet(models.QuerySet):
+    """Query helpers for the track API"""
+
+    def with_download_status(self, user=None):
+        """Annotate the given user's download status of each track, None if
+        never downloaded
+        """
+
+        if user is not None and user.is_authenticated:
+            return self.annotate(download_status=Subquery(
+                TrackDownload.objects.filter(track=OuterRef('pk'), user=user)
+                .values('status')[:1]
+            ))
+        return self
+
+
+class MediaLikeQuerySet(models.QuerySet):
+
+    def set_liked(self, media_slug, user, liked):
+        """Upsert the user's like of a media and return the new like count.
+
+        The insert-or-update and the counter change run as one statement. The
+        conflict update only happens when the liked state flips, so only a
+        returned row moves the counter: a flip or a new like. Otherwise the
+        media row isn't written and the count is read as is.
+        """
+
+        like_table = self.model._meta.db_table
+        media_table = Media._meta.db_table
+        now = timezone.now()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH toggled AS (
+                    INSERT INTO {like}
+                        (media_id, user_id, liked, created_at, updated_at)
+                    SELECT id, %s, %s, %s, %s FROM {media} WHERE slug = %s
+                    ON CONFLICT (media_id, user_id) DO UPDATE
+                        SET liked = EXCLUDED.liked,
+                            updated_at = EXCLUDED.updated_at
+                        WHERE {like}.liked <> EXCLUDED.liked
+                    RETURNING liked, xmax = 0 AS inserted
+                )
+                UPDATE {media} SET like_count = like_count + (
+                    SELECT CASE WHEN liked THEN 1 ELSE -1 END FROM toggled)
+                WHERE slug = %s
+                    AND EXISTS (SELECT 1 FROM toggled
+                                WHERE liked OR NOT inserted)
+                RETURNING like_count
+                """.format(like=like_table, media=media_table),
+                [user.pk, liked, now, now, media_slug, media_slug]
+            )
+            row = cursor.fetchone()
+            if row is None:
+                # nothing flipped, or the media doesn't exist
+                cursor.execute(
+                    'SELECT like_count FROM {} WHERE slug = %s'.format(
+                        media_table),
+                    [media_slug]
+                )
+                row = cursor.fetchone()
+
+        if row is None:
+            raise Media.DoesNotExist('Media matching query does not exist.')
+        return row[0]
+
+
+class TrackDownloadQuerySet(models.QuerySet):
+
+    def set_status(self, track_slug, user, status):
+        """Upsert the user's download status of a track in one statement and
+        return the track id
+        """
+
+        download_table = self.model._meta.db_table
+        track_table = Track._meta.db_table
+        now = timezone.now()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO {download}
+                    (track_id, user_id, status, created_at, updated_at)
+                SELECT id, %s, %s, %s, %s FROM {track} WHERE slug = %s
+                ON CONFLICT (track_id, user_id) DO UPDATE
+                    SET status = EXCLUDED.status,
+                        updated_at = EXCLUDED.updated_at
+                RETURNING track_id
+                """.format(download=download_table, track=track_table),
+                [user.pk, status, now, now, track_slug]
+            )
+            row = cursor.fetchone()
+
+        if row is None:
+            raise Track.DoesNotExist('Track matching query does not exist.')
+        return row[0]
+
+
+def format_rating(rating):
+    """Abbreviate a like count for display, e.g. 1500 -> 2K"""
+
+    if rating >= 1000000000:
+        rating = "%.0f%s" % (rating / 1000000000.00, 'B')
+    elif rating >= 1000000:
+        rating = "%.0f%s" % (rating / 1000000.00, 'M')
+    elif rating >= 1000:
+        rating = "%.0f%s" % (rating / 1000.0, 'K')
+    return str(rating)
+
+
 class Media(TimeStampedModel):
     """Common model for Album and Audiobook"""
 
@@ -190,6 +419,10 @@ class Media(TimeStampedModel):
     release_date = models.DateField(null=True)
     description = models.TextField()
     featured = models.BooleanField(default=False)
+    # number of active likes, kept in sync by MediaLike.objects.set_liked
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    # title, author and narrator names and description, kept in sync by signals
+    search_vector = SearchVectorField(null=True, editable=False)
 
     # Audiobook
     word_count = models.PositiveIntegerField(null=True)
@@ -233,8 +466,23 @@ class Media(TimeStampedModel):
         on_delete=models.PROTECT
     )
 
+    objects = MediaQuerySet.as_manager()
+
     class Meta:
         ordering = ['-id']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='media_search_vector_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'),
+                     name='media_title_upper_trgm_idx'),
+            # featured and per format sections of /home, only published
+            # media is listed
+            models.Index(fields=['featured', '-created_at'],
+                         name='media_published_featured_idx',
+                         condition=Q(status='PUBLISHED')),
+            models.Index(fields=['media_format', '-created_at'],
+                         name='media_published_format_idx',
+                         condition=Q(status='PUBLISHED')),
+        ]
 
     def __str__(self):
         return self.title
@@ -258,20 +506,10 @@ class Media(TimeStampedModel):
         return StatusType(self.status).name.title()
 
     def is_liked(self, user):
-        ml = self.medialike_set.filter(user=user)
-        if ml.exists() and ml.count() > 0:
-            return ml[0].liked
-        return False
+        return self.medialike_set.filter(user=user, liked=True).exists()
 
     def get_rating(self):
-        rating = self.medialike_set.filter(liked=True).count()
-        if rating >= 1000000000:
-            rating = "%.0f%s" % (rating / 1000000000.00, 'B')
-        elif rating >= 1000000:
-            rating = "%.0f%s" % (rating / 1000000.00, 'M')
-        elif rating >= 1000:
-            rating = "%.0f%s" % (rating / 1000.0, 'K')
-        return str(rating)
+        return format_rating(self.like_count)
 
 
 class Track(TimeStampedModel):
@@ -280,11 +518,19 @@ class Track(TimeStampedModel):
     name = models.CharField(max_length=255)
     popularity = models.PositiveIntegerField()
     # original_url = models.URLField(max_length=200)
-    file_url = models.FileField(null=True, upload_to=track_file_path, validators=[validate_file_type])
+    file_url = ContentAddressedFileField(null=True,
+                                         upload_to=settings.TRACK_FILE_DIR,
+                                         validators=[validate_file_type])
     duration = models.PositiveIntegerField()
     slug = models.SlugField(blank=True, unique=True)
     sample = models.BooleanField(default=False)
     sequence = models.PositiveIntegerField()
+    # read from the file by the probe_track task
+    bitrate = models.PositiveIntegerField(null=True, blank=True,
+                                          editable=False)  # kbps
+    codec = models.CharField(max_length=32, blank=True, editable=False)
+    sample_rate = models.PositiveIntegerField(null=True, blank=True,
+                                              editable=False)  # Hz
 
     medias = models.ManyToManyField(Media, through=Media.tracks.through, blank=True)
     user = models.ForeignKey(
@@ -292,21 +538,104 @@ class Track(TimeStampedModel):
         on_delete=models.PROTECT
     )
 
+    objects = TrackQuerySet.as_manager()
+
     class Meta:
         ordering = ['-sequence', '-id']
+        indexes = [
+            models.Index(fields=['-sequence', '-id'],
+                         name='track_sequence_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
     def is_downloaded(self, user):
-        td = self.trackdownload_set.filter(user=user).order_by('-created_at')
-        if td.exists() and td.count() > 0:
-            return td[0].status == 'DOWNLOADED'
-        return False
+        # use the status annotated by TrackQuerySet.with_download_status when
+        # available
+        if hasattr(self, 'download_status'):
+            return self.download_status == TrackDownload.StatusType.DOWNLOADED
+
+        return self.trackdownload_set.filter(
+            user=user, status=TrackDownload.StatusType.DOWNLOADED).exists()
+
+
+class TrackRendition(TimeStampedModel):
+    """Transcoded version of a track's audio, made by the encode_track task"""
+
+    track = models.ForeignKey(
+        'track',
+        related_name='renditions',
+        on_delete=models.CASCADE
+    )
+
+    # Format
+    class FormatType(models.TextChoices):
+        MP3 = "MP3"
+        HLS = "HLS"
+
+    format = models.CharField(
+        max_length=15,
+        choices=FormatType.choices
+    )
+    # kbps, None for the HLS master playlist of all the bitrates
+    bitrate = models.PositiveIntegerField(null=True)
+    file = models.FileField(max_length=255)
+    # sha256 of the source audio the rendition was made from
+    source_hash = models.CharField(max_length=64)
+
+    class Meta:
+        ordering = ['format', 'bitrate']
+
+    def __str__(self):
+        return "{} - {} {}".format(self.track_id, self.format,
+                                   self.bitrate or 'master')
+
+
+class TrackUpload(TimeStampedModel):
+    """Resumable upload of a track's audio file, sent in chunks that are
+    stored as the parts of a multipart upload
+    """
+
+    slug = models.SlugField(blank=True, unique=True)
+    track = models.ForeignKey(
+        'track',
+        on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT
+    )
+    # storage name the parts are staged under until the upload is finalized
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    # number of bytes received so far
+    offset = models.PositiveBigIntegerField(default=0)
+    upload_id = models.CharField(max_length=1024)
+    # [part number, ETag] of the stored parts
+    parts = models.JSONField(default=list)
+    # ResumableSHA256 state of the bytes received so far
+    sha256_state = models.BinaryField(default=b'')
+
+    # Status
+    class StatusType(models.TextChoices):
+        UPLOADING = "UPLOADING"
+        COMPLETED = "COMPLETED"
+
+    status = models.CharField(
+        max_length=15,
+        choices=StatusType.choices,
+        default=StatusType.UPLOADING
+    )
+
+    def __str__(self):
+        return "{} - {}/{}".format(self.name, self.offset, self.size)
 
 
 class TrackDownload(TimeStampedModel):
-    """Logs the download and removal of a track"""
+    """Latest download status of a track for a user, the history is in
+    TrackDownloadEvent
+    """
     track = models.ForeignKey(
         'track',
         on_delete=models.CASCADE
@@ -326,10 +655,44 @@ class TrackDownload(TimeStampedModel):
         choices=StatusType.choices
     )
 
+    objects = TrackDownloadQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['track', 'user'],
+                                    name='trackdownload_track_user_unique'),
+        ]
+
     def __str__(self):
         return "{} - {} - {}".format(self.user.name, self.track.name, self.status)
 
 
+class TrackDownloadEvent(models.Model):
+    """Append-only log of the downloads and removals of a track.
+
+    The table is partitioned by month on created_at (see the
+    create_download_event_partitions command), so its primary key is
+    (id, created_at) in the database.
+    """
+
+    track = models.ForeignKey(
+        'track',
+        on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT
+    )
+    status = models.CharField(
+        max_length=15,
+        choices=TrackDownload.StatusType.choices
+    )
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    def __str__(self):
+        return "{} - {} - {}".format(self.user_id, self.track_id, self.status)
+
+
 class MediaLike(TimeStampedModel):
     """Logs the likes of a media"""
     media = models.ForeignKey(
@@ -342,6 +705,18 @@ class MediaLike(TimeStampedModel):
     )
     liked = models.BooleanField(default=True)
 
+    objects = MediaLikeQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['media', 'user'],
+                                    name='medialike_media_user_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['media', 'liked'],
+                         name='medialike_media_liked_idx'),
+        ]
+
     def __str__(self):
         return "{} - {} - {}".format(self.user.name, self.media.title, self.liked)
 
@@ -351,11 +726,137 @@ def pre_save_receiver(sender, instance, *args, **kwargs):
         instance.slug = slugify(token_urlsafe(16))
 
 
-# resize image when user uploads it using admin interface
+def reference_blob(name, count=1):
+    """Count more rows referring to a stored file and return its count"""
+
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO {blobs} (name, ref_count, created_at, updated_at)
+            VALUES (%(name)s, %(count)s, now(), now())
+            ON CONFLICT (name) DO UPDATE
+            SET ref_count = {blobs}.ref_count + %(count)s, updated_at = now()
+            RETURNING ref_count
+        """.format(blobs=Blob._meta.db_table), {'name': name, 'count': count})
+        return cursor.fetchone()[0]
+
+
+def dereference_blob(name):
+    Blob.objects.filter(name=name, ref_count__gt=0).update(
+        ref_count=F('ref_count') - 1, updated_at=timezone.now())
+
+
+def rendition_dir(rendition):
+    """Directory of the files rendered from the source of a rendition. The
+    directory is counted as one blob with a reference per rendition row, HLS
+    segments have no rows of their own.
+    """
+
+    if isinstance(rendition, ImageRendition):
+        return source_rendition_dir(settings.IMAGE_DIR, rendition.source_hash)
+    return source_rendition_dir(settings.TRACK_FILE_DIR,
+                                rendition.source_hash)
+
+
+def reference_renditions(renditions):
+    """Count the renditions made with bulk_create, which sends no signals"""
+
+    for name, count in Counter(map(rendition_dir, renditions)).items():
+        reference_blob(name, count)
+    return renditions
+
+
+def rendition_post_save_receiver(sender, instance, created, *args, **kwargs):
+    if created:
+        reference_blob(rendition_dir(instance))
+
+
+def rendition_post_delete_receiver(sender, instance, *args, **kwargs):
+    dereference_blob(rendition_dir(instance))
+
+
+def file_pre_save_receiver(sender, instance, update_fields=None, *args,
+                           **kwargs):
+    field = FILE_FIELDS[sender]
+    if instance._state.adding:
+        instance._previous_file_name = ''
+    elif update_fields is None or field in update_fields:
+        instance._previous_file_name = sender.objects.filter(pk=instance.pk) \
+            .values_list(field, flat=True).first() or ''
+
+
+def update_file_references(instance):
+    """Move the reference of a saved row from its previous file to its
+    current one. Returns whether the file changed and whether other rows
+    already had the new file.
+    """
+
+    previous = instance.__dict__.pop('_previous_file_name', None)
+    current = getattr(instance, FILE_FIELDS[type(instance)]).name or ''
+    if previous is None or previous == current:
+        return False, False
+
+    if previous:
+        dereference_blob(previous)
+    return True, bool(current) and reference_blob(current) > 1
+
+
+def file_post_delete_receiver(sender, instance, *args, **kwargs):
+    name = getattr(instance, FILE_FIELDS[sender]).name
+    if name:
+        dereference_blob(name)
+
+
+def copy_image_renditions(image):
+    """Reuse the renditions of another image with the same file, returns
+    whether there were any
+    """
+
+    renditions = ImageRendition.objects.filter(image__file=image.file.name) \
+        .exclude(image=image)
+    donor_id = renditions.values_list('image_id', flat=True).first()
+    if donor_id is None:
+        return False
+
+    reference_renditions(ImageRendition.objects.bulk_create([
+        ImageRendition(image=image, format=rendition.format,
+                       width=rendition.width, file=rendition.file,
+                       source_hash=rendition.source_hash)
+        for rendition in renditions.filter(image_id=donor_id)
+    ]))
+    return True
+
+
+def copy_track_renditions(track):
+    """Reuse the metadata and renditions of another processed track with the
+    same file, returns whether there was one
+    """
+
+    donor = Track.objects.filter(file_url=track.file_url.name,
+                                 renditions__isnull=False) \
+        .exclude(pk=track.pk).exclude(codec='').first()
+    if donor is None:
+        return False
+
+    Track.objects.filter(pk=track.pk).update(
+        duration=donor.duration, bitrate=donor.bitrate, codec=donor.codec,
+        sample_rate=donor.sample_rate)
+    reference_renditions(TrackRendition.objects.bulk_create([
+        TrackRendition(track=track, format=rendition.format,
+                       bitrate=rendition.bitrate, file=rendition.file,
+                       source_hash=rendition.source_hash)
+        for rendition in donor.renditions.all()
+    ]))
+    update_estimated_length(track.medias.values_list('pk', flat=True))
+    return True
+
+
+# render every image size from a newly uploaded file in one pass, a file
+# another image already has reuses its renditions
 def post_save_receiver(sender, instance, *args, **kwargs):
-    if instance.file:
-        resize_image.delay(instance.file.name, instance.size.watermark, instance.size.logo_max_width_height_ratio,
-                           instance.size.logo_top_left_ratio, instance.size.width)
+    changed, shared = update_file_references(instance)
+    if changed and instance.file and \
+            not (shared and copy_image_renditions(instance)):
+        transaction.on_commit(lambda: render_image.delay(instance.pk))
 
 
 pre_save.connect(pre_save_receiver, sender=Genre)
@@ -367,5 +868,148 @@ pre_save.connect(pre_save_receiver, sender=Language)
 pre_save.connect(pre_save_receiver, sender=ImageSize)
 pre_save.connect(pre_save_receiver, sender=Image)
 pre_save.connect(pre_save_receiver, sender=Narrator)
+pre_save.connect(pre_save_receiver, sender=TrackUpload)
 
 post_save.connect(post_save_receiver, sender=Image)
+
+
+# transcode a newly uploaded track file and read its metadata, a file another
+# track already has reuses its renditions and metadata
+def track_file_receiver(sender, instance, *args, **kwargs):
+    changed, shared = update_file_references(instance)
+    if changed and instance.file_url and \
+            not (shared and copy_track_renditions(instance)):
+        transaction.on_commit(lambda: encode_track.delay(instance.pk))
+        transaction.on_commit(lambda: probe_track.delay(instance.pk))
+
+
+FILE_FIELDS = {Image: 'file', Track: 'file_url'}
+
+pre_save.connect(file_pre_save_receiver, sender=Image)
+pre_save.connect(file_pre_save_receiver, sender=Track)
+post_save.connect(track_file_receiver, sender=Track)
+post_delete.connect(file_post_delete_receiver, sender=Image)
+post_delete.connect(file_post_delete_receiver, sender=Track)
+post_save.connect(rendition_post_save_receiver, sender=ImageRendition)
+post_save.connect(rendition_post_save_receiver, sender=TrackRendition)
+post_delete.connect(rendition_post_delete_receiver, sender=ImageRendition)
+post_delete.connect(rendition_post_delete_receiver, sender=TrackRendition)
+
+
+# drop the cached home feed whenever something it renders changes
+def home_cache_receiver(sender, *args, **kwargs):
+    invalidate_home_cache()
+
+
+def home_cache_m2m_receiver(sender, action, *args, **kwargs):
+    if action.startswith('post_'):
+        invalidate_home_cache()
+
+
+post_save.connect(home_cache_receiver, sender=Media)
+post_save.connect(home_cache_receiver, sender=Format)
+post_save.connect(home_cache_receiver, sender=Track)
+post_save.connect(home_cache_receiver, sender=Genre)
+post_save.connect(home_cache_receiver, sender=Language)
+post_save.connect(home_cache_receiver, sender=Author)
+post_save.connect(home_cache_receiver, sender=Narrator)
+post_save.connect(home_cache_receiver, sender=Image)
+post_delete.connect(home_cache_receiver, sender=Media)
+post_delete.connect(home_cache_receiver, sender=Format)
+post_delete.connect(home_cache_receiver, sender=Track)
+
+m2m_changed.connect(home_cache_m2m_receiver, sender=Media.genres.through)
+m2m_changed.connect(home_cache_m2m_receiver, sender=Media.tracks.through)
+m2m_changed.connect(home_cache_m2m_receiver, sender=Media.images.through)
+m2m_changed.connect(home_cache_m2m_receiver, sender=Media.authors.through)
+m2m_changed.connect(home_cache_m2m_receiver, sender=Media.narrators.through)
+m2m_changed.connect(home_cache_m2m_receiver, sender=Author.images.through)
+
+
+# publish a new /searchby version once the facet change is committed
+def searchby_cache_receiver(sender, *args, **kwargs):
+    transaction.on_commit(bump_searchby_version)
+
+
+post_save.connect(searchby_cache_receiver, sender=Language)
+post_save.connect(searchby_cache_receiver, sender=Format)
+post_save.connect(searchby_cache_receiver, sender=Genre)
+post_delete.connect(searchby_cache_receiver, sender=Language)
+post_delete.connect(searchby_cache_receiver, sender=Format)
+post_delete.connect(searchby_cache_receiver, sender=Genre)
+
+
+def update_search_vector(media_ids):
+    """Recompute the stored search vector of the given medias"""
+
+    Media.objects.filter(pk__in=media_ids).update(
+        search_vector=media_search_vector(Author, Narrator)
+    )
+
+
+def media_search_receiver(sender, instance, *args, **kwargs):
+    update_search_vector([instance.pk])
+
+
+def media_search_name_receiver(sender, instance, *args, **kwargs):
+    update_search_vector(instance.media_set.values('pk'))
+
+
+def media_search_m2m_receiver(sender, instance, action, reverse, pk_set,
+                              *args, **kwargs):
+    if reverse and action == 'pre_clear':
+        # a clear has no pk_set, remember the medias before they are unlinked
+        instance._search_media_ids = list(
+            instance.media_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_search_vector([instance.pk])
+    elif action == 'post_clear':
+        update_search_vector(instance.__dict__.pop('_search_media_ids', []))
+    elif pk_set:
+        update_search_vector(pk_set)
+
+
+post_save.connect(media_search_receiver, sender=Media)
+post_save.connect(media_search_name_receiver, sender=Author)
+post_save.connect(media_search_name_receiver, sender=Narrator)
+m2m_changed.connect(media_search_m2m_receiver, sender=Media.authors.through)
+m2m_changed.connect(media_search_m2m_receiver, sender=Media.narrators.through)
+
+
+def update_estimated_length(media_ids):
+    """Recompute the estimated length of the given medias from their track
+    durations. Medias without tracks keep the length entered for them.
+    """
+
+    durations = Track.objects.filter(medias=OuterRef('pk')) \
+        .order_by().values('medias').annotate(total=Sum('duration')) \
+        .values('total')
+    Media.objects.filter(pk__in=media_ids).update(
+        estimated_length_in_seconds=Coalesce(
+            Subquery(durations), F('estimated_length_in_seconds'))
+    )
+
+
+def media_length_m2m_receiver(sender, instance, action, pk_set,
+                              *args, **kwargs):
+    if action == 'pre_clear' and not isinstance(instance, Media):
+        # a clear has no pk_set, remember the medias before they are unlinked
+        instance._length_media_ids = list(
+            instance.medias.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # Track.medias shares the table, the changes come from either side as
+    # forward changes
+    if isinstance(instance, Media):
+        update_estimated_length([instance.pk])
+    elif action == 'post_clear':
+        update_estimated_length(instance.__dict__.pop('_length_media_ids', []))
+    elif pk_set:
+        update_estimated_length(pk_set)
+
+
+m2m_changed.connect(media_length_m2m_receiver, sender=Media.tracks.through)
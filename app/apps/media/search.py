@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+    SearchVector, TrigramWordSimilarity
+from django.db.models import F, OuterRef, Subquery
+
+
+def _names(model, relation):
+    """Space separated names of the related objects of the outer media"""
+
+    return Subquery(
+        model.objects.filter(**{relation: OuterRef('pk')})
+        .order_by().values(relation)
+        .annotate(names=StringAgg('name', ' ')).values('names')
+    )
+
+
+def media_search_vector(author_model, narrator_model):
+    """Weighted tsvector over title, author and narrator names and
+    description
+    """
+
+    config = settings.MEDIA_SEARCH_CONFIG
+    return (
+        SearchVector('title', weight='A', config=config) +
+        SearchVector(_names(author_model, 'media'), weight='B',
+                     config=config) +
+        SearchVector(_names(narrator_model, 'media'), weight='B',
+                     config=config) +
+        SearchVector('description', weight='C', config=config)
+    )
+
+
+def search_medias(queryset, text):
+    """Filter the medias matching the search text, best match first"""
+
+    query = SearchQuery(text, search_type='websearch',
+                        config=settings.MEDIA_SEARCH_CONFIG)
+    return queryset.filter(search_vector=query) \
+        .annotate(search_rank=SearchRank(F('search_vector'), query)) \
+        .order_by('-search_rank', '-id')
+
+
+def suggest(queryset, field, text, limit):
+    """Values of the field containing the text, closest match first.
+    icontains compares UPPER(field), the gin_trgm_ops index is built over it.
+    """
+
+    return list(
+        queryset.filter(**{'{}__icontains'.format(field): text})
+        .annotate(similarity=TrigramWordSimilarity(text, field))
+        .order_by('-similarity', field)
+        .values('slug', field)[:limit]
+    )
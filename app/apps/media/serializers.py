@@ -1,10 +1,34 @@
 import datetime
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.fields import CurrentUserDefault
-from apps.media.models import Genre, Track, Media, Language, Format, Author, Image, \
-    Narrator, TrackDownload, MediaLike
+
+from apps.media.models import Genre, Track, Media, Language, Format, Author, \
+    Image, Narrator, TrackDownload, MediaLike, TrackUpload, TrackRendition, \
+    ImageRendition
 
 from apps.common.utils.validators import validate_image_size, validate_file_type
+from apps.common.utils.signed_urls import signed_url
+
+
+class SignedFileField(serializers.FileField):
+    """File field rendered as a signed, expiring direct download URL"""
+
+    def to_representation(self, value):
+        return signed_url(value)
+
+
+class SignedImageField(serializers.ImageField):
+    """Image field rendered as a signed, expiring direct download URL"""
+
+    def to_internal_value(self, data):
+        # validate_image_size reads the header, ImageField would decode the
+        # whole image again
+        return serializers.FileField.to_internal_value(self, data)
+
+    def to_representation(self, value):
+        return signed_url(value)
 
 
 class SlugRelatedField(serializers.SlugRelatedField):
@@ -14,11 +38,27 @@ class SlugRelatedField(serializers.SlugRelatedField):
         return value.name
 
 
+def image_file(image):
+    """The PNG rendition of the image at its own size, the uploaded file until
+    it is rendered
+    """
+
+    for rendition in image.renditions.all():
+        if rendition.width == image.size.width and \
+                rendition.format == ImageRendition.FormatType.PNG:
+            return rendition.file
+    return image.file
+
+
 class ImageSlugRelatedField(serializers.SlugRelatedField):
     """Serializer for author objects"""
 
     def to_representation(self, value):
-        return {'slug': value.slug, 'width': value.size.width, 'image': value.file.url}
+        renditions = ImageRenditionSerializer(value.renditions.all(),
+                                              many=True)
+        return {'slug': value.slug, 'width': value.size.width,
+                'image': signed_url(image_file(value)),
+                'renditions': renditions.data}
 
 
 class MediaSlugRelatedField(serializers.SlugRelatedField):
@@ -103,18 +143,47 @@ class AuthorSerializer(serializers.ModelSerializer):
 
 
 # Image Serializers
+class ImageRenditionSerializer(serializers.ModelSerializer):
+    """Serializer for the resized versions of an image"""
+
+    file = SignedFileField(read_only=True)
+
+    class Meta:
+        model = ImageRendition
+        fields = ('width', 'format', 'file')
+
+
 class ImageSerializer(serializers.ModelSerializer):
     """Serializer for language objects"""
 
+    file = SignedImageField(required=False, allow_null=True,
+                            validators=[validate_image_size])
+    renditions = ImageRenditionSerializer(many=True, read_only=True)
+
     class Meta:
         model = Image
-        fields = ('slug', 'file')
+        fields = ('slug', 'file', 'renditions')
         read_only_fields = ('id',)
         lookup_field = 'slug'
 
 
 # Track serializers
-class TrackSerializer(serializers.ModelSerializer):
+class TrackDownloadedMixin:
+    """Renders whether the requesting user downloaded the track. Querysets
+    annotated with Track.objects.with_download_status don't query per track.
+    """
+
+    def get_downloaded(self, obj):
+        user = None
+        request = self.context.get('request', None)
+        if request:
+            user = request.user
+        if user is None or not user.is_authenticated:
+            return False
+        return obj.is_downloaded(user)
+
+
+class TrackSerializer(TrackDownloadedMixin, serializers.ModelSerializer):
     """Serializer for track objects"""
 
     medias = MediaSlugRelatedField(
@@ -122,11 +191,14 @@ class TrackSerializer(serializers.ModelSerializer):
         slug_field='slug',
         queryset=Media.objects.all()
     )
+    file_url = SignedFileField(read_only=True)
+    downloaded = serializers.SerializerMethodField()
 
     class Meta:
         model = Track
         fields = ('slug', 'name', 'popularity', 'file_url', 'sample', 'sequence',
-                  'duration', 'medias')
+                  'duration', 'bitrate', 'codec', 'sample_rate', 'medias',
+                  'downloaded')
         read_only_fields = ('id', 'slug', 'file_url')
         lookup_field = 'slug'
 
@@ -143,7 +215,20 @@ class TrackFileSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class TracksDisplaySerializer(serializers.ModelSerializer):
+class TrackRenditionSerializer(serializers.ModelSerializer):
+    """Serializer for the transcoded versions of a track"""
+
+    file = SignedFileField(read_only=True)
+
+    class Meta:
+        model = TrackRendition
+        fields = ('format', 'bitrate', 'file')
+
+
+class TracksDisplaySerializer(TrackDownloadedMixin,
+                              serializers.ModelSerializer):
+    file_url = SignedFileField(read_only=True)
+    renditions = TrackRenditionSerializer(many=True, read_only=True)
     duration = serializers.SerializerMethodField()
     downloaded = serializers.SerializerMethodField()
 
@@ -155,7 +240,8 @@ class TracksDisplaySerializer(serializers.ModelSerializer):
             'file_url',
             'duration',
             'sequence',
-            'downloaded'
+            'downloaded',
+            'renditions'
         )
         read_only_fields = ('name', 'file_url')
 
@@ -165,22 +251,16 @@ class TracksDisplaySerializer(serializers.ModelSerializer):
             delta = datetime.timedelta(seconds=obj.duration)
         return str(delta)
 
-    def get_downloaded(self, obj):
-        user = None
-        request = self.context.get('request', None)
-        if request:
-            user = request.user
-        return obj.is_downloaded(user)
-
 
 # Track Download serializers
 class TrackDownloadSerializer(serializers.ModelSerializer):
     """Serializer for track objects"""
 
+    # the track comes from the route
     track = serializers.SlugRelatedField(
         many=False,
         slug_field='slug',
-        queryset=Track.objects.all()
+        read_only=True
     )
 
     class Meta:
@@ -189,6 +269,24 @@ class TrackDownloadSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+class TrackUploadSerializer(serializers.ModelSerializer):
+    """Serializer for resumable track uploads"""
+
+    filename = serializers.CharField(write_only=True, max_length=255)
+
+    class Meta:
+        model = TrackUpload
+        fields = ('slug', 'filename', 'size', 'offset', 'status')
+        read_only_fields = ('slug', 'offset', 'status')
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.TRACK_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                _('File size should be between 1 and {} bytes').format(
+                    settings.TRACK_UPLOAD_MAX_SIZE))
+        return value
+
+
 # Media serializer
 class MediaSerializer(serializers.ModelSerializer):
     """Serializer for media objects"""
@@ -233,8 +331,14 @@ class MediaSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
     def get_tracks(self, obj):
-        return TracksDisplaySerializer(obj.tracks.all().order_by('sequence'), many=True, context={
-            'request': self.context.get('request', None)
+        request = self.context.get('request', None)
+        tracks = getattr(obj, 'ordered_tracks', None)
+        if tracks is None:
+            tracks = obj.tracks \
+                .with_download_status(getattr(request, 'user', None)) \
+                .prefetch_related('renditions').order_by('sequence')
+        return TracksDisplaySerializer(tracks, many=True, context={
+            'request': request
         }).data
 
     def get_release_date(self, obj):
@@ -246,10 +350,16 @@ class MediaSerializer(serializers.ModelSerializer):
         return obj.get_rating()
 
     def get_liked(self, obj):
+        # annotated by MediaQuerySet.with_likes
+        if hasattr(obj, 'liked_by_user'):
+            return obj.liked_by_user
+
         user = None
         request = self.context.get('request', None)
         if request:
             user = request.user
+        if user is None or not user.is_authenticated:
+            return False
         return obj.is_liked(user)
 
 
@@ -261,3 +371,20 @@ class MediaLikeSerializer(serializers.ModelSerializer):
         model = MediaLike
         fields = ('liked', 'created_at')
         read_only_fields = ('id',)
+
+
+class MediaSummarySerializer(serializers.ModelSerializer):
+    """Compact media for carts and orders, without tracks, likes and ratings.
+    Querysets loaded with Media.objects.for_summary don't query per media.
+    """
+
+    media_format = SlugRelatedField(read_only=True, slug_field='slug')
+    authors = SlugRelatedField(many=True, read_only=True, slug_field='slug')
+    images = ImageSlugRelatedField(many=True, read_only=True,
+                                   slug_field='slug')
+
+    class Meta:
+        model = Media
+        fields = ('title', 'price', 'discount_price', 'slug', 'media_format',
+                  'authors', 'images')
+        read_only_fields = fields
@@ -0,0 +1,133 @@
+import os
+import hashlib
+import logging
+import subprocess
+from celery.decorators import task
+from tempfile import TemporaryDirectory
+
+from django.db import transaction
+from django.conf import settings
+
+from apps.common.utils.renditions import rendition_dir, store_rendition
+from apps.media.cache import invalidate_home_cache
+
+
+def download_and_hash(storage, name, path):
+    digest = hashlib.sha256()
+    with storage.open(name, 'rb') as source, open(path, 'wb') as target:
+        for chunk in source.chunks():
+            digest.update(chunk)
+            target.write(chunk)
+    return digest.hexdigest()
+
+
+def ffmpeg_command(source, workdir, bitrates):
+    """One ffmpeg run that decodes the source once and writes an MP3 and an HLS
+    variant per bitrate
+    """
+
+    command = [settings.FFMPEG_BINARY, '-nostdin', '-loglevel', 'error', '-y',
+               '-i', source]
+    for bitrate in bitrates:
+        command += ['-map', '0:a:0', '-c:a', 'libmp3lame',
+                    '-b:a', '{}k'.format(bitrate),
+                    os.path.join(workdir, '{}k.mp3'.format(bitrate))]
+    for bitrate in bitrates:
+        hls = os.path.join(workdir, 'hls')
+        command += ['-map', '0:a:0', '-c:a', 'aac',
+                    '-b:a', '{}k'.format(bitrate),
+                    '-f', 'hls',
+                    '-hls_time', str(settings.TRACK_HLS_SEGMENT_SECONDS),
+                    '-hls_playlist_type', 'vod',
+                    '-hls_segment_filename',
+                    os.path.join(hls, '{}k_%03d.ts'.format(bitrate)),
+                    os.path.join(hls, '{}k.m3u8'.format(bitrate))]
+    return command
+
+
+def master_playlist(bitrates):
+    lines = ['#EXTM3U']
+    for bitrate in bitrates:
+        lines += ['#EXT-X-STREAM-INF:BANDWIDTH={},CODECS="mp4a.40.2"'.format(
+                      bitrate * 1000),
+                  '{}k.m3u8'.format(bitrate)]
+    return '\n'.join(lines) + '\n'
+
+
+def store(storage, name, path):
+    with open(path, 'rb') as f:
+        return store_rendition(storage, name, f)
+
+
+@task(name='encode_track')
+def encode_track(track_id):
+    # models.py imports the tasks
+    from apps.media.models import Track, TrackRendition, reference_renditions
+
+    try:
+        track = Track.objects.filter(pk=track_id).first()
+        if track is None or not track.file_url:
+            logging.info("Unable to find track to encode")
+            return
+
+        storage = track.file_url.storage
+        bitrates = sorted(settings.TRACK_RENDITION_BITRATES)
+
+        with TemporaryDirectory() as workdir:
+            source = os.path.join(workdir, 'source')
+            source_hash = download_and_hash(storage, track.file_url.name,
+                                            source)
+
+            # one MP3 and one HLS variant per bitrate and the HLS master
+            # playlist
+            encoded = track.renditions.filter(source_hash=source_hash).count()
+            if encoded == len(bitrates) * 2 + 1:
+                logging.info("Track {} is already encoded".format(track.slug))
+                return
+
+            target = rendition_dir(settings.TRACK_FILE_DIR, source_hash)
+            master = os.path.join(target, 'hls', 'master.m3u8')
+            if not storage.exists(master):
+                hls = os.path.join(workdir, 'hls')
+                os.makedirs(hls)
+                subprocess.run(ffmpeg_command(source, workdir, bitrates),
+                               check=True, capture_output=True,
+                               timeout=settings.TRACK_ENCODE_TIMEOUT)
+                with open(os.path.join(hls, 'master.m3u8'), 'w') as f:
+                    f.write(master_playlist(bitrates))
+
+                for filename in sorted(os.listdir(hls)):
+                    if filename != 'master.m3u8':
+                        store(storage, os.path.join(target, 'hls', filename),
+                              os.path.join(hls, filename))
+                for bitrate in bitrates:
+                    mp3 = '{}k.mp3'.format(bitrate)
+                    store(storage, os.path.join(target, mp3),
+                          os.path.join(workdir, mp3))
+                # stored last, it marks the renditions of the hash as complete
+                store(storage, master, os.path.join(hls, 'master.m3u8'))
+
+        renditions = [(TrackRendition.FormatType.HLS, None, master)]
+        for bitrate in bitrates:
+            renditions += [
+                (TrackRendition.FormatType.MP3, bitrate,
+                 os.path.join(target, '{}k.mp3'.format(bitrate))),
+                (TrackRendition.FormatType.HLS, bitrate,
+                 os.path.join(target, 'hls', '{}k.m3u8'.format(bitrate))),
+            ]
+
+        with transaction.atomic():
+            track.renditions.all().delete()
+            reference_renditions(TrackRendition.objects.bulk_create([
+                TrackRendition(track=track, format=rendition_format,
+                               bitrate=bitrate, file=name,
+                               source_hash=source_hash)
+                for rendition_format, bitrate, name in renditions
+            ]))
+            # the home feed renders the renditions, bulk_create sends no
+            # signals
+            transaction.on_commit(invalidate_home_cache)
+        logging.info("Track {} is encoded successfully".format(track.slug))
+    except Exception as ex:
+        logging.error("Unable to encode track: {}".format(track_id))
+        logging.error(ex)
@@ -0,0 +1,45 @@
+import logging
+from celery.decorators import task
+
+from django.db import transaction
+
+from apps.common.utils.audio import read_audio_metadata
+from apps.media.cache import invalidate_home_cache
+
+
+def probe_track_file(track):
+    """Store the metadata read from the track file and update the length of
+    its medias
+    """
+
+    # models.py imports the tasks
+    from apps.media.models import Track, update_estimated_length
+
+    metadata = read_audio_metadata(track.file_url.storage, track.file_url.name)
+    if metadata['duration'] is None:
+        # keep the duration that was entered
+        del metadata['duration']
+
+    with transaction.atomic():
+        # update() sends no post_save, the file isn't encoded and probed again
+        Track.objects.filter(pk=track.pk).update(**metadata)
+        update_estimated_length(track.medias.values_list('pk', flat=True))
+        transaction.on_commit(invalidate_home_cache)
+    return metadata
+
+
+@task(name='probe_track')
+def probe_track(track_id):
+    from apps.media.models import Track
+
+    try:
+        track = Track.objects.filter(pk=track_id).first()
+        if track is None or not track.file_url:
+            logging.info("Unable to find track to probe")
+            return
+
+        probe_track_file(track)
+        logging.info("Track {} is probed successfully".format(track.slug))
+    except Exception as ex:
+        logging.error("Unable to probe track: {}".format(track_id))
+        logging.error(ex)
@@ -0,0 +1,107 @@
+import os
+import hashlib
+import logging
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, features
+from celery.decorators import task
+
+from django.db import transaction
+from django.conf import settings
+
+from apps.common.utils.file_processor import resize_and_watermark
+from apps.common.utils.renditions import rendition_dir, store_rendition
+from apps.media.cache import invalidate_home_cache
+
+EXTENSIONS = {'PNG': 'png', 'WEBP': 'webp', 'AVIF': 'avif'}
+
+
+def rendition_name(source_hash, width, image_format):
+    return os.path.join(rendition_dir(settings.IMAGE_DIR, source_hash),
+                        'w{}.{}'.format(width, EXTENSIONS[image_format]))
+
+
+def rendition_formats():
+    image_formats = []
+    for image_format in settings.IMAGE_RENDITION_FORMATS:
+        if image_format == 'AVIF' and not features.check('avif'):
+            logging.warning(
+                "Pillow can't encode AVIF, skipping the AVIF renditions")
+            continue
+        image_formats.append(image_format)
+    return image_formats
+
+
+def read_and_hash(storage, name):
+    with storage.open(name, 'rb') as f:
+        content = f.read()
+    return content, hashlib.sha256(content).hexdigest()
+
+
+def encode(image, image_format):
+    f = BytesIO()
+    image.save(f, image_format, quality=settings.IMAGE_RENDITION_QUALITY)
+    f.seek(0)
+    return f
+
+
+@task(name='render_image')
+def render_image(image_id):
+    # models.py imports the tasks
+    from apps.media.models import Image as ImageModel, ImageSize, \
+        ImageRendition, reference_renditions
+
+    try:
+        image = ImageModel.objects.filter(pk=image_id).first()
+        if image is None or not image.file:
+            logging.info("Unable to find image to render")
+            return
+
+        storage = image.file.storage
+        # sizes that share a width share their renditions
+        sizes = {size.width: size for size
+                 in ImageSize.objects.order_by('-width', 'pk')}.values()
+        image_formats = rendition_formats()
+
+        content, source_hash = read_and_hash(storage, image.file.name)
+        rendered = image.renditions.filter(source_hash=source_hash).count()
+        if rendered == len(sizes) * len(image_formats):
+            logging.info("Image {} is already rendered".format(image.slug))
+            return
+
+        # decoded once for every size and format
+        source = Image.open(BytesIO(content)).convert("RGBA")
+
+        renditions = {}
+        for size in sizes:
+            resized = resize_and_watermark(source, size.width, size.watermark,
+                                           size.logo_max_width_height_ratio,
+                                           size.logo_top_left_ratio)
+            for image_format in image_formats:
+                renditions[(size.width, image_format)] = encode(resized,
+                                                                image_format)
+
+        def store(key):
+            return store_rendition(storage, rendition_name(source_hash, *key),
+                                   renditions[key])
+
+        # encoding holds the GIL, writing to the storage waits on the network
+        workers = settings.IMAGE_RENDITION_UPLOAD_WORKERS
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            names = dict(zip(renditions,
+                             executor.map(store, renditions)))
+
+        with transaction.atomic():
+            image.renditions.all().delete()
+            reference_renditions(ImageRendition.objects.bulk_create([
+                ImageRendition(image=image, width=width, format=image_format,
+                               file=name, source_hash=source_hash)
+                for (width, image_format), name in names.items()
+            ]))
+            # the home feed renders the renditions, bulk_create sends no
+            # signals
+            transaction.on_commit(invalidate_home_cache)
+        logging.info("Image {} is rendered successfully".format(image.slug))
+    except Exception as ex:
+        logging.error("Unable to render image: {}".format(image_id))
+        logging.error(ex)
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from apps.media.models import Blob, Image, ImageRendition, ImageSize, Track, \
+    TrackRendition
+
+AUDIO = b'ID3 audio'
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+class ContentAddressedStorageTest(TestCase):
+    """Test image and track files are stored once by the hash of their
+    content
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.size = ImageSize.objects.create(name='Large', width=300,
+                                             watermark=False, user=self.user)
+
+    def sample_track(self, sequence=1, content=AUDIO):
+        track = Track.objects.create(name='Track', popularity=1, duration=60,
+                                     sequence=sequence, user=self.user)
+        track.file_url.save('Chapter.MP3', ContentFile(content))
+        return track
+
+    def sample_image(self):
+        image = Image.objects.create(name='Cover', size=self.size,
+                                     user=self.user)
+        image.file.save('cover.png', ContentFile(b'png'))
+        return image
+
+    def test_identical_files_are_stored_once(self):
+        """Test the same bytes uploaded twice share one object and count both
+        rows
+        """
+
+        with patch('apps.media.models.encode_track'), \
+                patch('apps.media.models.probe_track'):
+            first = self.sample_track(1)
+            second = self.sample_track(2)
+
+        digest = hashlib.sha256(AUDIO).hexdigest()
+        self.assertEqual(first.file_url.name,
+                         'audio/{}/{}.mp3'.format(digest[:2], digest))
+        self.assertEqual(second.file_url.name, first.file_url.name)
+        self.assertEqual(os.listdir(os.path.dirname(first.file_url.path)),
+                         ['{}.mp3'.format(digest)])
+        self.assertEqual(Blob.objects.get(name=first.file_url.name).ref_count,
+                         2)
+
+    def test_replaced_file_is_released(self):
+        """Test replacing or deleting a file moves its reference"""
+
+        with patch('apps.media.models.encode_track'), \
+                patch('apps.media.models.probe_track'):
+            track = self.sample_track()
+            previous = track.file_url.name
+            track.file_url.save('chapter.mp3', ContentFile(b'ID3 other audio'))
+
+        self.assertEqual(Blob.objects.get(name=previous).ref_count, 0)
+        self.assertEqual(Blob.objects.get(name=track.file_url.name).ref_count,
+                         1)
+
+        track.delete()
+        self.assertEqual(Blob.objects.get(name=track.file_url.name).ref_count,
+                         0)
+
+    def test_identical_image_reuses_renditions(self):
+        """Test an image with a file that is already rendered doesn't queue
+        another render
+        """
+
+        with patch('apps.media.models.render_image') as render_image, \
+                self.captureOnCommitCallbacks(execute=True):
+            rendered = self.sample_image()
+        self.assertEqual(render_image.delay.call_count, 1)
+        ImageRendition.objects.create(image=rendered,
+                                      format=ImageRendition.FormatType.PNG,
+                                      width=300,
+                                      file='images/renditions/hash/w300.png',
+                                      source_hash='hash')
+
+        with patch('apps.media.models.render_image') as render_image, \
+                self.captureOnCommitCallbacks(execute=True):
+            image = self.sample_image()
+            # saving without changing the file doesn't render it again either
+            image.save()
+
+        render_image.delay.assert_not_called()
+        self.assertEqual(list(image.renditions.values_list('file', flat=True)),
+                         ['images/renditions/hash/w300.png'])
+        self.assertEqual(
+            Blob.objects.get(name='images/renditions/hash').ref_count, 2)
+
+    def test_identical_track_reuses_renditions(self):
+        """Test a track with a file that is already processed copies its
+        metadata and renditions
+        """
+
+        with patch('apps.media.models.encode_track'), \
+                patch('apps.media.models.probe_track'), \
+                self.captureOnCommitCallbacks(execute=True):
+            processed = self.sample_track(1)
+        Track.objects.filter(pk=processed.pk).update(
+            duration=125, bitrate=64, codec='mp3', sample_rate=44100)
+        TrackRendition.objects.create(track=processed,
+                                      format=TrackRendition.FormatType.MP3,
+                                      bitrate=64,
+                                      file='audio/renditions/hash/64k.mp3',
+                                      source_hash='hash')
+
+        with patch('apps.media.models.encode_track') as encode_track, \
+                patch('apps.media.models.probe_track') as probe_track, \
+                self.captureOnCommitCallbacks(execute=True):
+            track = self.sample_track(2)
+
+        encode_track.delay.assert_not_called()
+        probe_track.delay.assert_not_called()
+        track.refresh_from_db()
+        self.assertEqual((track.duration, track.codec), (125, 'mp3'))
+        self.assertEqual(track.renditions.count(), 1)
+
+    def test_unreferenced_files_are_deleted(self):
+        """Test the garbage collection removes files no row refers to any
+        more
+        """
+
+        with patch('apps.media.models.encode_track'), \
+                patch('apps.media.models.probe_track'):
+            kept = self.sample_track(1)
+            released = self.sample_track(2, content=b'ID3 released audio')
+        path = released.file_url.path
+        released.delete()
+        Blob.objects.update(updated_at=timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        call_command('delete_unreferenced_blobs', '--dry-run', stdout=out)
+        self.assertIn('Found 1 unreferenced files', out.getvalue())
+        self.assertTrue(os.path.exists(path))
+
+        call_command('delete_unreferenced_blobs', stdout=StringIO())
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(kept.file_url.path))
+        self.assertEqual(list(Blob.objects.values_list('name', flat=True)),
+                         [kept.file_url.name])
+
+    def test_unreferenced_renditions_are_deleted(self):
+        """Test the rendition directories are deleted with the last rendition
+        made into them
+        """
+
+        with patch('apps.media.models.render_image'), \
+                patch('apps.media.models.encode_track'), \
+                patch('apps.media.models.probe_track'):
+            image = self.sample_image()
+            track = self.sample_track()
+        names = ['images/renditions/hash/w300.png',
+                 'audio/renditions/hash/64k.mp3',
+                 'audio/renditions/hash/hls/64k.m3u8',
+                 'audio/renditions/hash/hls/64k_000.ts']
+        for name in names:
+            default_storage.save(name, ContentFile(b'rendition'))
+        ImageRendition.objects.create(image=image,
+                                      format=ImageRendition.FormatType.PNG,
+                                      width=300, file=names[0],
+                                      source_hash='hash')
+        for rendition_format, name in (
+                (TrackRendition.FormatType.MP3, names[1]),
+                (TrackRendition.FormatType.HLS, names[2])):
+            TrackRendition.objects.create(track=track, format=rendition_format,
+                                          bitrate=64, file=name,
+                                          source_hash='hash')
+        self.assertEqual(
+            Blob.objects.get(name='audio/renditions/hash').ref_count, 2)
+
+        image.delete()
+        track.renditions.all().delete()
+        Blob.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        call_command('delete_unreferenced_blobs', stdout=StringIO())
+
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+        self.assertFalse(
+            Blob.objects.filter(name__contains='renditions').exists())
+
+    def test_uploads_are_hashed_while_received(self):
+        """Test the upload handlers hash the uploaded files"""
+
+        for content in (b'small', b'large' * 1024 * 1024):
+            request = RequestFactory().post(
+                '/', {'file': SimpleUploadedFile('cover.png', content)})
+            self.assertEqual(request.FILES['file'].sha256,
+                             hashlib.sha256(content).hexdigest())
@@ -0,0 +1,146 @@
+import threading
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.media.events import flush_track_download_events, \
+    log_track_download
+from apps.media.models import Track, TrackDownload, TrackDownloadEvent
+
+
+def download_url(track_slug):
+    """Return the download URL of a track"""
+
+    return reverse('media:track_download-list',
+                   kwargs={'track_slug': track_slug, 'version': 'v1'})
+
+
+class TrackDownloadApiTest(TestCase):
+    """Test the track download API"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.track = Track.objects.create(name='Track', popularity=1,
+                                          duration=60, sequence=1,
+                                          user=self.user)
+        # don't leak queued events into other tests
+        self.addCleanup(flush_track_download_events)
+
+    def test_status_is_upserted(self):
+        """Test each status change updates the single row of the user and
+        track
+        """
+
+        with self.assertNumQueries(1):
+            res = self.client.post(download_url(self.track.slug),
+                                   {'status': 'DOWNLOADED'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(self.track.is_downloaded(self.user))
+
+        res = self.client.post(download_url(self.track.slug),
+                               {'status': 'REMOVED'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(self.track.is_downloaded(self.user))
+
+        downloads = TrackDownload.objects.filter(track=self.track,
+                                                 user=self.user)
+        self.assertEqual([download.status for download in downloads],
+                         ['REMOVED'])
+
+    def test_invalid_status(self):
+        """Test an unknown status is rejected"""
+
+        res = self.client.post(download_url(self.track.slug),
+                               {'status': 'PLAYED'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(TrackDownload.objects.exists())
+
+    def test_unknown_track(self):
+        """Test downloading a track that doesn't exist fails"""
+
+        res = self.client.post(download_url('unknown'),
+                               {'status': 'DOWNLOADED'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TRACK_DOWNLOAD_EVENT_BATCH_SIZE=2)
+    def test_events_are_written_in_batches(self):
+        """Test the history keeps every status change and is written once the
+        batch is full
+        """
+
+        self.client.post(download_url(self.track.slug),
+                         {'status': 'DOWNLOADED'})
+        self.assertFalse(TrackDownloadEvent.objects.exists())
+
+        self.client.post(download_url(self.track.slug), {'status': 'REMOVED'})
+        events = TrackDownloadEvent.objects.filter(
+            track=self.track, user=self.user).order_by('created_at')
+        self.assertEqual([event.status for event in events],
+                         ['DOWNLOADED', 'REMOVED'])
+
+    @override_settings(TRACK_DOWNLOAD_EVENT_FLUSH_SECONDS=0.01)
+    def test_idle_events_are_flushed(self):
+        """Test queued events are written after the flush interval"""
+
+        flushed = threading.Event()
+        with patch('apps.media.events.flush_track_download_events',
+                   side_effect=flushed.set):
+            log_track_download(self.track.pk, self.user.pk, 'DOWNLOADED')
+            self.assertTrue(flushed.wait(5))
+
+
+class TrackDownloadEventCommandTest(TestCase):
+    """Test the track download history commands"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.track = Track.objects.create(name='Track', popularity=1,
+                                          duration=60, sequence=1,
+                                          user=self.user)
+
+    def test_backfill_download_events(self):
+        """Test the backfill adds one event per download status, once"""
+
+        TrackDownload.objects.create(track=self.track, user=self.user,
+                                     status='DOWNLOADED')
+
+        call_command('backfill_download_events', stdout=StringIO())
+        call_command('backfill_download_events', stdout=StringIO())
+
+        events = TrackDownloadEvent.objects.filter(track=self.track,
+                                                   user=self.user)
+        self.assertEqual([event.status for event in events], ['DOWNLOADED'])
+
+    def test_create_partitions_moves_default_rows(self):
+        """Test events of a new month move from the default partition to the
+        month's partition
+        """
+
+        event = TrackDownloadEvent.objects.create(track=self.track,
+                                                  user=self.user,
+                                                  status='DOWNLOADED')
+
+        call_command('create_download_event_partitions', months=2,
+                     stdout=StringIO())
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text '
+                           'FROM media_trackdownloadevent WHERE id = %s',
+                           [event.pk])
+            partition = cursor.fetchone()[0]
+        self.assertEqual(partition,
+                         'media_trackdownloadevent_y{}m{:02d}'.format(
+                             event.created_at.year, event.created_at.month))
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from apps.media.models import Track, TrackRendition
+from apps.media.serializers import TracksDisplaySerializer
+from apps.media.tasks.encode_track_task import encode_track
+
+
+def fake_ffmpeg(command, **kwargs):
+    """Write an empty file for every output and segment of an ffmpeg command"""
+
+    for arg in command:
+        if arg.endswith(('.mp3', '.m3u8', '.ts')):
+            with open(arg.replace('%03d', '000'), 'w'):
+                pass
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    TRACK_RENDITION_BITRATES=[64, 32])
+@patch('apps.media.tasks.encode_track_task.subprocess.run',
+       side_effect=fake_ffmpeg)
+class EncodeTrackTest(TestCase):
+    """Test the track transcoding task"""
+
+    def setUp(self):
+        # a fresh storage per test, the renditions of earlier tests would be
+        # reused
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+
+    def sample_track(self, content=b'ID3 audio'):
+        track = Track.objects.create(name='Track', popularity=1, duration=60,
+                                     sequence=1, user=self.user)
+        track.file_url.save('chapter.mp3', ContentFile(content))
+        return track
+
+    def test_renditions_are_recorded(self, run):
+        """Test each bitrate gets an MP3 and an HLS variant next to the master
+        playlist
+        """
+
+        track = self.sample_track()
+
+        encode_track(track.pk)
+
+        renditions = [(rendition.format, rendition.bitrate)
+                      for rendition in track.renditions.all()]
+        self.assertEqual(renditions, [('HLS', 32), ('HLS', 64), ('HLS', None),
+                                      ('MP3', 32), ('MP3', 64)])
+        for rendition in track.renditions.all():
+            self.assertTrue(os.path.exists(rendition.file.path))
+        self.assertEqual(run.call_count, 1)
+
+        data = TracksDisplaySerializer(
+            Track.objects.prefetch_related('renditions').get(pk=track.pk)).data
+        self.assertEqual(len(data['renditions']), 5)
+
+    def test_encoding_is_idempotent(self, run):
+        """Test the same audio is transcoded once, even for another track"""
+
+        track = self.sample_track()
+        encode_track(track.pk)
+        encode_track(track.pk)
+
+        other_track = self.sample_track()
+        encode_track(other_track.pk)
+
+        self.assertEqual(run.call_count, 1)
+        self.assertEqual(
+            TrackRendition.objects.filter(track=other_track).count(), 5)
+        self.assertEqual(
+            set(TrackRendition.objects.values_list('source_hash', flat=True)),
+            {track.renditions.first().source_hash})
+
+    def test_new_audio_replaces_renditions(self, run):
+        """Test a changed source is transcoded again"""
+
+        track = self.sample_track()
+        encode_track(track.pk)
+        old_hash = track.renditions.first().source_hash
+
+        track.file_url.save('chapter.mp3', ContentFile(b'ID3 new audio'))
+        encode_track(track.pk)
+
+        self.assertEqual(run.call_count, 2)
+        self.assertNotEqual(
+            set(track.renditions.values_list('source_hash', flat=True)),
+            {old_hash})
+        self.assertEqual(track.renditions.count(), 5)
@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.media.models import Format, Language, Media, MediaLike
+
+HOME_URL = reverse('media:home-list', kwargs={"version": "v1"})
+
+
+class HomeApiTest(TestCase):
+    """Test the home feed API"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.language = Language.objects.create(name='Amharic', user=self.user)
+        self.audiobook = Format.objects.create(name='Audiobook', sequence=1,
+                                               user=self.user)
+        self.album = Format.objects.create(name='Album', sequence=2,
+                                           user=self.user)
+
+    def sample_media(self, media_format, **params):
+        defaults = {
+            'title': 'Sample media',
+            'price': 10,
+            'description': 'Sample media',
+            'status': Media.StatusType.PUBLISHED,
+        }
+        defaults.update(params)
+
+        return Media.objects.create(media_format=media_format,
+                                    language=self.language, user=self.user,
+                                    **defaults)
+
+    def test_latest_medias_per_format(self):
+        """Test every format section holds its latest published medias"""
+
+        audiobooks = [self.sample_media(self.audiobook,
+                                        title='Book {}'.format(i))
+                      for i in range(7)]
+        self.sample_media(self.album, title='Album')
+        self.sample_media(self.album, title='Draft',
+                          status=Media.StatusType.UNPUBLISHED)
+
+        res = self.client.get(HOME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([section['id'] for section in res.data],
+                         ['featured', self.audiobook.slug, self.album.slug])
+        self.assertEqual([media['slug'] for media in res.data[1]['medias']],
+                         [media.slug for media in reversed(audiobooks[2:])])
+        self.assertEqual([media['title'] for media in res.data[2]['medias']],
+                         ['Album'])
+
+    def test_cached_sections_merge_user_state(self):
+        """Test the cached sections carry the requesting user's liked flag"""
+
+        media = self.sample_media(self.audiobook)
+        self.client.get(HOME_URL)
+
+        other_user = get_user_model().objects.create_user('+251911000001',
+                                                          'testpass')
+        MediaLike.objects.create(media=media, user=other_user)
+        self.client.force_authenticate(other_user)
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(HOME_URL)
+
+        self.assertTrue(res.data[1]['medias'][0]['liked'])
+        # at most one query for the liked and one for the downloaded flags
+        self.assertLessEqual(len(context.captured_queries), 2)
+
+    def test_saving_media_invalidates_cache(self):
+        """Test the home feed is rebuilt after a media changes"""
+
+        media = self.sample_media(self.audiobook)
+        self.client.get(HOME_URL)
+
+        media.title = 'New title'
+        media.save()
+
+        res = self.client.get(HOME_URL)
+        self.assertEqual(res.data[1]['medias'][0]['title'], 'New title')
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.test import TestCase
+
+from apps.media.models import Format, Language, Media, MediaLike, Track, \
+    TrackDownload
+
+
+class HotPathIndexTest(TestCase):
+    """Test the hot endpoint queries are planned as index scans"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('+251911000000',
+                                                        'testpass')
+        cls.media_format = Format.objects.create(name='Audiobook', sequence=1,
+                                                 user=cls.user)
+        language = Language.objects.create(name='Amharic', user=cls.user)
+
+        statuses = [Media.StatusType.PUBLISHED, Media.StatusType.UNPUBLISHED,
+                    Media.StatusType.ARCHIVED]
+        medias = Media.objects.bulk_create([
+            Media(title='Media {}'.format(i), slug='media-{}'.format(i),
+                  description='Sample media', price=10,
+                  status=statuses[i % 3], featured=i % 10 == 0,
+                  media_format=cls.media_format, language=language,
+                  user=cls.user)
+            for i in range(3000)
+        ])
+        cls.media = medias[0]
+        cls.track = Track.objects.create(name='Track', slug='track',
+                                         popularity=1, duration=60,
+                                         sequence=1, user=cls.user)
+
+        users = get_user_model().objects.bulk_create([
+            get_user_model()(phone_number='+2519110{:05d}'.format(i),
+                             password='!')
+            for i in range(1, 200)
+        ])
+        MediaLike.objects.bulk_create([MediaLike(media=media, user=user)
+                                       for media in medias[:20]
+                                       for user in users])
+        TrackDownload.objects.bulk_create([
+            TrackDownload(track=cls.track, user=user, status='DOWNLOADED')
+            for user in users
+        ])
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE media_media, media_medialike, '
+                           'media_trackdownload')
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            # the seeded tables are small, so keep the planner from
+            # preferring a sequential scan
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_featured_medias(self):
+        queryset = Media.objects.filter(status=Media.StatusType.PUBLISHED,
+                                        featured=True) \
+            .order_by('-created_at')[:5]
+        self.assertUsesIndex(queryset, 'media_published_featured_idx')
+
+    def test_latest_medias_of_format(self):
+        queryset = Media.objects.filter(status=Media.StatusType.PUBLISHED,
+                                        media_format=self.media_format) \
+            .order_by('-created_at')[:5]
+        self.assertUsesIndex(queryset, 'media_published_format_idx')
+
+    def test_media_like_of_user(self):
+        queryset = MediaLike.objects.filter(media=self.media, user=self.user)
+        self.assertUsesIndex(queryset, 'medialike_media_user_unique')
+
+    def test_latest_track_download_of_user(self):
+        queryset = TrackDownload.objects.filter(track=self.track,
+                                                user=self.user) \
+            .order_by('-created_at')[:1]
+        self.assertUsesIndex(queryset, 'trackdownload_track_user_unique')
+
+    def test_title_suggestion(self):
+        queryset = Media.objects.filter(title__icontains='dia 12') \
+            .annotate(similarity=TrigramWordSimilarity('dia 12', 'title')) \
+            .order_by('-similarity', 'title')[:5]
+        self.assertUsesIndex(queryset, 'media_title_upper_trgm_idx')
@@ -0,0 +1,121 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.media.models import Format, Language, Media, MediaLike
+
+
+def like_url(media_slug):
+    """Return the like URL of a media"""
+
+    return reverse('media:media_like-list',
+                   kwargs={'media_slug': media_slug, 'version': 'v1'})
+
+
+class MediaLikeApiTest(TestCase):
+    """Test the media like API"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.media = Media.objects.create(
+            title='Sample media',
+            price=10,
+            description='Sample media',
+            media_format=Format.objects.create(name='Audiobook', sequence=1,
+                                               user=self.user),
+            language=Language.objects.create(name='Amharic', user=self.user),
+            user=self.user
+        )
+
+    def test_like_count_follows_liked_state(self):
+        """Test the counter only changes when the liked state flips"""
+
+        with self.assertNumQueries(1):
+            res = self.client.post(like_url(self.media.slug), {'liked': True},
+                                   format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['rating'], '1')
+
+        res = self.client.post(like_url(self.media.slug), {'liked': True},
+                               format='json')
+        self.assertEqual(res.data['rating'], '1')
+
+        res = self.client.post(like_url(self.media.slug), {'liked': False},
+                               format='json')
+        self.assertEqual(res.data['rating'], '0')
+
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.like_count, 0)
+
+    def test_repeated_like_keeps_media_row(self):
+        """Test a like that doesn't flip the state doesn't write the media
+        row
+        """
+
+        def media_row_version():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT ctid FROM media_media WHERE id = %s',
+                               [self.media.pk])
+                return cursor.fetchone()[0]
+
+        self.client.post(like_url(self.media.slug), {'liked': True},
+                         format='json')
+        version = media_row_version()
+
+        with self.assertNumQueries(2):
+            res = self.client.post(like_url(self.media.slug), {'liked': True},
+                                   format='json')
+        self.assertEqual(res.data['rating'], '1')
+        self.assertEqual(media_row_version(), version)
+
+    def test_unlike_without_like(self):
+        """Test unliking a media that was never liked keeps a single row and
+        the counter
+        """
+
+        res = self.client.post(like_url(self.media.slug), {'liked': False},
+                               format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['rating'], '0')
+
+        res = self.client.post(like_url(self.media.slug), {'liked': True},
+                               format='json')
+        self.assertEqual(res.data['rating'], '1')
+        self.assertEqual(MediaLike.objects.filter(media=self.media,
+                                                  user=self.user).count(), 1)
+
+    def test_like_unknown_media(self):
+        """Test liking a media that doesn't exist fails without creating a
+        like
+        """
+
+        res = self.client.post(like_url('unknown'), {'liked': True},
+                               format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(MediaLike.objects.exists())
+
+    def test_rebuild_like_counts(self):
+        """Test the rebuild command repairs a drifted counter"""
+
+        other_user = get_user_model().objects.create_user('+251911000001',
+                                                          'testpass')
+        MediaLike.objects.create(media=self.media, user=self.user, liked=True)
+        MediaLike.objects.create(media=self.media, user=other_user,
+                                 liked=False)
+        Media.objects.filter(pk=self.media.pk).update(like_count=42)
+
+        call_command('rebuild_like_counts', stdout=StringIO())
+
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.like_count, 1)
@@ -0,0 +1,150 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.media.models import Genre, Format, Language, ImageSize, Image, \
+    Author, Narrator, Media, Track, MediaLike, TrackDownload
+
+MEDIA_URL = reverse('media:medias-list', kwargs={"version": "v1"})
+
+
+@patch('apps.media.models.render_image')
+class MediaListQueryCountTest(TestCase):
+    """Test that the media list is served in a fixed number of queries"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            '+251911000000',
+            'testpass',
+            name='admin',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.media_format = Format.objects.create(name='Audiobook', sequence=1,
+                                                  user=self.user)
+        self.language = Language.objects.create(name='Amharic', user=self.user)
+        self.size = ImageSize.objects.create(name='Small', width=300,
+                                             watermark=False, user=self.user)
+
+    def sample_media(self, index):
+        """Create a published media with every relation the serializer
+        renders
+        """
+
+        media = Media.objects.create(
+            title='Media {}'.format(index),
+            price=10,
+            description='Sample media',
+            status=Media.StatusType.PUBLISHED,
+            media_format=self.media_format,
+            language=self.language,
+            user=self.user
+        )
+        image = Image.objects.create(name='Cover {}'.format(index),
+                                     file='images/w300/cover.png',
+                                     size=self.size, user=self.user)
+        author = Author.objects.create(name='Author {}'.format(index),
+                                       sex='MALE', user=self.user)
+        author.images.add(image)
+
+        media.images.add(image)
+        media.authors.add(author)
+        media.genres.add(Genre.objects.create(name='Genre {}'.format(index),
+                                              user=self.user))
+        media.narrators.add(Narrator.objects.create(
+            name='Narrator {}'.format(index), sex='FEMALE', user=self.user))
+
+        for sequence in range(3):
+            track = Track.objects.create(name='Track {}'.format(sequence),
+                                         popularity=1, duration=60,
+                                         sequence=sequence, user=self.user)
+            media.tracks.add(track)
+            TrackDownload.objects.create(track=track, user=self.user,
+                                         status='DOWNLOADED')
+
+        MediaLike.objects.create(media=media, user=self.user)
+        Media.objects.filter(pk=media.pk).update(like_count=1)
+
+        return media
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(MEDIA_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_grow_with_page_size(self, render_image):
+        """Test listing 1 or 10 media costs the same number of queries"""
+
+        self.sample_media(0)
+        single_page_queries = self.count_list_queries()
+
+        for index in range(1, 10):
+            self.sample_media(index)
+        full_page_queries = self.count_list_queries()
+
+        self.assertEqual(single_page_queries, full_page_queries)
+        self.assertLessEqual(full_page_queries, 12)
+
+    def test_list_renders_prefetched_state(self, render_image):
+        """Test the prefetched likes, tracks and downloads are rendered"""
+
+        self.sample_media(0)
+
+        res = self.client.get(MEDIA_URL)
+
+        media = res.data['results'][0]
+        self.assertTrue(media['liked'])
+        self.assertEqual(media['rating'], '1')
+        self.assertEqual([track['sequence'] for track in media['tracks']],
+                         [0, 1, 2])
+        self.assertTrue(all(track['downloaded'] for track in media['tracks']))
+
+    def test_like_annotations(self, render_image):
+        """Test liked is annotated per user"""
+
+        media = self.sample_media(0)
+        other_user = get_user_model().objects.create_user('+251911000001',
+                                                          'testpass')
+        MediaLike.objects.create(media=media, user=other_user, liked=False)
+
+        self.assertFalse(Media.objects.with_likes(other_user)
+                         .get(pk=media.pk).liked_by_user)
+        self.assertTrue(Media.objects.with_likes(self.user)
+                        .get(pk=media.pk).liked_by_user)
+
+    def test_media_tracks_query_count(self, render_image):
+        """Test the downloaded flags of a media's tracks are loaded in one
+        query
+        """
+
+        media = self.sample_media(0)
+        for sequence in range(3, 40):
+            media.tracks.add(Track.objects.create(
+                name='Track {}'.format(sequence), popularity=1, duration=60,
+                sequence=sequence, user=self.user))
+
+        url = reverse('media:media_tracks-list',
+                      kwargs={'media_slug': media.slug, 'version': 'v1'})
+        with self.assertNumQueries(2):
+            res = self.client.get(url)
+
+        downloaded = {track['sequence']: track['downloaded']
+                      for track in res.data}
+        self.assertEqual(len(downloaded), 40)
+        self.assertTrue(all(downloaded[sequence] for sequence in range(3)))
+        self.assertFalse(any(downloaded[sequence]
+                             for sequence in range(3, 40)))
+
+        track = Media.objects.get(pk=media.pk).tracks \
+            .with_download_status(self.user).get(sequence=0)
+        self.assertEqual(track.download_status,
+                         TrackDownload.StatusType.DOWNLOADED)
@@ -0,0 +1,160 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.media.models import Format, Language, Media, Track
+from apps.media.tasks.probe_track_task import probe_track
+
+MEDIA_ROOT = tempfile.mkdtemp()
+FFPROBE_OUTPUT = {
+    'streams': [{'codec_name': 'mp3', 'sample_rate': '44100',
+                 'bit_rate': '64000'}],
+    'format': {'duration': '125.4', 'bit_rate': '64210'},
+}
+
+
+def fake_ffprobe(output=FFPROBE_OUTPUT):
+    return MagicMock(
+        return_value=MagicMock(stdout=json.dumps(output).encode()))
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    MEDIA_ROOT=MEDIA_ROOT)
+class ProbeTrackTest(TestCase):
+    """Test the audio metadata of the track files is read"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.media = Media.objects.create(
+            title='Media',
+            price=10,
+            description='Sample media',
+            media_format=Format.objects.create(name='Audiobook', sequence=1,
+                                               user=self.user),
+            language=Language.objects.create(name='Amharic', user=self.user),
+            user=self.user
+        )
+
+    def sample_track(self, sequence=1, duration=60, file=True):
+        track = Track.objects.create(name='Track {}'.format(sequence),
+                                     popularity=1, duration=duration,
+                                     sequence=sequence, user=self.user)
+        if file:
+            track.file_url.save('chapter.mp3', ContentFile(b'ID3 audio'))
+        return track
+
+    def test_track_metadata_is_stored(self):
+        """Test the duration, bitrate, codec and sample rate are read from the
+        file
+        """
+
+        track = self.sample_track()
+
+        with patch('apps.common.utils.audio.subprocess.run',
+                   fake_ffprobe()) as run:
+            probe_track(track.pk)
+
+        self.assertEqual(run.call_args[0][0][-1], track.file_url.path)
+        track.refresh_from_db()
+        self.assertEqual(track.duration, 125)
+        self.assertEqual(track.bitrate, 64)
+        self.assertEqual(track.codec, 'mp3')
+        self.assertEqual(track.sample_rate, 44100)
+
+    def test_missing_values_are_tolerated(self):
+        """Test a file ffprobe reports little about keeps the entered
+        duration
+        """
+
+        track = self.sample_track()
+
+        with patch('apps.common.utils.audio.subprocess.run',
+                   fake_ffprobe({'streams': [], 'format': {}})):
+            probe_track(track.pk)
+
+        track.refresh_from_db()
+        self.assertEqual(track.duration, 60)
+        self.assertIsNone(track.bitrate)
+        self.assertEqual(track.codec, '')
+
+    def test_media_length_follows_tracks(self):
+        """Test the estimated length of a media is the sum of its track
+        durations
+        """
+
+        first = self.sample_track(1, duration=60, file=False)
+        second = self.sample_track(2, duration=30, file=False)
+
+        self.media.tracks.add(first, second)
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.estimated_length_in_seconds, 90)
+
+        first.medias.remove(self.media)
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.estimated_length_in_seconds, 30)
+
+        with patch('apps.common.utils.audio.subprocess.run', fake_ffprobe()):
+            second.file_url.save('chapter.mp3', ContentFile(b'ID3 audio'))
+            probe_track(second.pk)
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.estimated_length_in_seconds, 125)
+
+    def test_probe_tracks_command(self):
+        """Test the backfill command probes the tracks with a file that were
+        never probed
+        """
+
+        probed = self.sample_track(1)
+        skipped = self.sample_track(2, file=False)
+        self.media.tracks.add(probed, skipped)
+
+        out = StringIO()
+        with patch('apps.common.utils.audio.subprocess.run',
+                   fake_ffprobe()) as run:
+            call_command('probe_tracks', '--workers', '1', '--missing-only',
+                         stdout=out)
+
+        self.assertIn('Probed 1 tracks', out.getvalue())
+        self.assertEqual(run.call_count, 1)
+        probed.refresh_from_db()
+        self.assertEqual(probed.codec, 'mp3')
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.estimated_length_in_seconds, 125 + 60)
+
+    def test_entered_length_is_kept_without_tracks(self):
+        """Test a media without tracks keeps the length entered for it"""
+
+        Media.objects.filter(pk=self.media.pk).update(
+            estimated_length_in_seconds=3600)
+
+        with patch('apps.common.utils.audio.subprocess.run', fake_ffprobe()):
+            call_command('probe_tracks', '--workers', '1', stdout=StringIO())
+
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.estimated_length_in_seconds, 3600)
+
+    def test_media_length_follows_cleared_track(self):
+        """Test clearing the medias of a track updates their length"""
+
+        first = self.sample_track(1, duration=60, file=False)
+        second = self.sample_track(2, duration=30, file=False)
+        self.media.tracks.add(first, second)
+
+        first.medias.clear()
+
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.estimated_length_in_seconds, 30)
@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image as PILImage
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from apps.common.utils import file_processor
+from apps.media.models import Image, ImageSize, ImageRendition
+from apps.media.serializers import ImageSerializer
+from apps.media.tasks import render_image_task
+from apps.media.tasks.render_image_task import render_image
+
+
+def png(width, height, color):
+    f = BytesIO()
+    PILImage.new('RGBA', (width, height), color).save(f, 'PNG')
+    return f.getvalue()
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    IMAGE_RENDITION_FORMATS=['PNG', 'WEBP', 'AVIF'])
+class RenderImageTest(TestCase):
+    """Test the image rendition task"""
+
+    def setUp(self):
+        # a fresh storage per test, the renditions of earlier tests would be
+        # reused
+        media_root = tempfile.mkdtemp()
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root,
+                                              STATIC_ROOT=static_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        os.makedirs(os.path.join(static_root, 'img'))
+        with open(os.path.join(static_root, 'img', 'logo.png'), 'wb') as f:
+            f.write(png(50, 50, (255, 0, 0, 255)))
+
+        file_processor.get_logo.cache_clear()
+        file_processor.get_resized_logo.cache_clear()
+
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.large = ImageSize.objects.create(name='Large', width=300,
+                                              watermark=True, user=self.user)
+        ImageSize.objects.create(name='Small', width=100, watermark=False,
+                                 user=self.user)
+
+    def sample_image(self):
+        image = Image.objects.create(name='Cover', size=self.large,
+                                     user=self.user)
+        image.file.save('cover.png',
+                        ContentFile(png(600, 400, (0, 0, 255, 255))))
+        return image
+
+    def test_every_size_and_format_is_rendered(self):
+        """Test one pass renders each image size in each format"""
+
+        image = self.sample_image()
+
+        with patch.object(render_image_task.Image, 'open',
+                          wraps=render_image_task.Image.open) as image_open:
+            render_image(image.pk)
+
+        # the source and the watermark logo
+        self.assertEqual(image_open.call_count, 2)
+        renditions = [(rendition.width, rendition.format)
+                      for rendition in image.renditions.all()]
+        self.assertEqual(renditions, [
+            (300, 'AVIF'), (300, 'PNG'), (300, 'WEBP'),
+            (100, 'AVIF'), (100, 'PNG'), (100, 'WEBP'),
+        ])
+        for rendition in image.renditions.all():
+            with PILImage.open(rendition.file.path) as rendered:
+                self.assertEqual(rendered.size,
+                                 (rendition.width, rendition.width * 2 // 3))
+                self.assertEqual(rendered.format, rendition.format)
+
+    def test_watermark_follows_the_size(self):
+        """Test only the sizes with a watermark get the logo"""
+
+        image = self.sample_image()
+        render_image(image.pk)
+
+        large = image.renditions.get(width=300,
+                                     format=ImageRendition.FormatType.PNG)
+        small = image.renditions.get(width=100,
+                                     format=ImageRendition.FormatType.PNG)
+        with PILImage.open(large.file.path) as rendered:
+            self.assertEqual(rendered.convert('RGB').getpixel((10, 10)),
+                             (255, 0, 0))
+        with PILImage.open(small.file.path) as rendered:
+            self.assertEqual(rendered.convert('RGB').getpixel((5, 5)),
+                             (0, 0, 255))
+
+    def test_logo_is_decoded_once(self):
+        """Test the watermark logo is read once per process and reused by
+        later images
+        """
+
+        storage = file_processor.staticfiles_storage
+        with patch.object(storage, 'open', wraps=storage.open) as static_open:
+            render_image(self.sample_image().pk)
+            render_image(self.sample_image().pk)
+
+        self.assertEqual(static_open.call_count, 1)
+
+    def test_rendered_image_is_skipped(self):
+        """Test an image is not rendered again from the same source"""
+
+        image = self.sample_image()
+        render_image(image.pk)
+
+        with patch.object(render_image_task, 'encode') as encode:
+            render_image(image.pk)
+
+        encode.assert_not_called()
+        self.assertEqual(image.renditions.count(), 6)
+
+    def test_renditions_are_serialized(self):
+        """Test the image serializer lists the renditions"""
+
+        image = self.sample_image()
+        render_image(image.pk)
+
+        data = ImageSerializer(
+            Image.objects.prefetch_related('renditions').get(pk=image.pk)).data
+        self.assertEqual(len(data['renditions']), 6)
+        self.assertEqual(data['renditions'][0]['width'], 300)
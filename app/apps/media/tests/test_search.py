@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework.test import APIClient
+
+from apps.media.models import Author, Narrator, Format, Language, Media
+
+MEDIA_URL = reverse('media:medias-list', kwargs={"version": "v1"})
+
+
+class MediaSearchApiTest(TestCase):
+    """Test the full text search of the media API"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.media_format = Format.objects.create(name='Audiobook', sequence=1,
+                                                  user=self.user)
+        self.language = Language.objects.create(name='Amharic', user=self.user)
+
+    def sample_media(self, title, description='Sample media'):
+        return Media.objects.create(title=title, description=description,
+                                    price=10,
+                                    status=Media.StatusType.PUBLISHED,
+                                    media_format=self.media_format,
+                                    language=self.language, user=self.user)
+
+    def search(self, text):
+        res = self.client.get(MEDIA_URL, {'q': text})
+        return [media['title'] for media in res.data['results']]
+
+    def test_search_by_title_and_description(self):
+        """Test title matches rank above description matches"""
+
+        self.sample_media('Quiet river', description='A story')
+        self.sample_media('Mountain', description='Walking along the river')
+        self.sample_media('Desert')
+
+        self.assertEqual(self.search('river'), ['Quiet river', 'Mountain'])
+
+    def test_search_vector_follows_authors_and_narrators(self):
+        """Test adding or renaming an author or narrator updates the vector"""
+
+        media = self.sample_media('Fikir Eske Mekabir')
+        author = Author.objects.create(name='Haddis Alemayehu', sex='MALE',
+                                       user=self.user)
+        media.authors.add(author)
+        media.narrators.add(Narrator.objects.create(name='Abebe', sex='MALE',
+                                                    user=self.user))
+
+        self.assertEqual(self.search('haddis'), ['Fikir Eske Mekabir'])
+        self.assertEqual(self.search('abebe'), ['Fikir Eske Mekabir'])
+
+        author.name = 'Tsegaye'
+        author.save()
+
+        self.assertEqual(self.search('haddis'), [])
+        self.assertEqual(self.search('tsegaye'), ['Fikir Eske Mekabir'])
+
+    def test_search_vector_follows_cleared_author(self):
+        """Test clearing the medias of an author updates their search vector"""
+
+        media = self.sample_media('Fikir Eske Mekabir')
+        author = Author.objects.create(name='Haddis Alemayehu', sex='MALE',
+                                       user=self.user)
+        media.authors.add(author)
+        self.assertEqual(self.search('haddis'), ['Fikir Eske Mekabir'])
+
+        author.media_set.clear()
+
+        self.assertEqual(self.search('haddis'), [])
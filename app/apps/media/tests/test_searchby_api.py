@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.media import cache as media_cache
+from apps.media.models import Genre, Language
+
+SEARCHBY_URL = reverse('media:searchby-list', kwargs={"version": "v1"})
+
+
+class SearchByApiTest(TestCase):
+    """Test the cached search facets API"""
+
+    def setUp(self):
+        cache.clear()
+        media_cache._local_searchby.update(version=None, data=None)
+
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        Language.objects.create(name='Amharic', user=self.user)
+
+    def test_unchanged_facets_are_not_modified(self):
+        """Test a client with the current ETag gets a 304 without a query"""
+
+        res = self.client.get(SEARCHBY_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [language['name'] for language in res.data['languages']],
+            ['Amharic'])
+        self.assertNotIn('genres', res.data)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(SEARCHBY_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_facet_change_bumps_version(self):
+        """Test saving a genre publishes a new version of the facets"""
+
+        etag = self.client.get(SEARCHBY_URL)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Genre.objects.create(name='Fiction', user=self.user)
+
+        res = self.client.get(SEARCHBY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual([genre['name'] for genre in res.data['genres']],
+                         ['Fiction'])
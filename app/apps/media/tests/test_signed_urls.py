@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from apps.common.utils import signed_urls
+from apps.media.models import Track
+from apps.media.serializers import TracksDisplaySerializer
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='apps.common.utils.storage.SignedFileSystemStorage',
+    MEDIA_ROOT=MEDIA_ROOT, SIGNED_URL_TTL=3600, SIGNED_URL_MIN_REMAINING=900)
+class SignedUrlTest(TestCase):
+    """Test tracks are rendered with cached signed URLs"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        signed_urls._signed.clear()
+
+        user = get_user_model().objects.create_user('+251911000000',
+                                                    'testpass')
+        self.track = Track.objects.create(name='Track', popularity=1,
+                                          duration=60, sequence=1, user=user)
+        self.track.file_url.save('chapter.mp3', ContentFile(b'audio'))
+
+    def render_file_url(self):
+        return TracksDisplaySerializer(self.track).data['file_url']
+
+    def test_url_is_signed(self):
+        """Test the rendered URL carries a valid expiring signature"""
+
+        url = urlparse(self.render_file_url())
+        query = parse_qs(url.query)
+
+        name = self.track.file_url.name
+        self.assertTrue(url.path.endswith(name))
+        self.assertTrue(default_storage.verify(name, query['expires'][0],
+                                               query['signature'][0]))
+        self.assertFalse(default_storage.verify(name, query['expires'][0],
+                                                'forged'))
+
+    def test_signature_is_reused(self):
+        """Test the signature is reused instead of signing every render"""
+
+        with patch('apps.common.utils.signed_urls.presign',
+                   wraps=signed_urls.presign) as presign:
+            first = self.render_file_url()
+            second = self.render_file_url()
+
+        self.assertEqual(first, second)
+        self.assertEqual(presign.call_count, 1)
+
+    def test_signature_is_renewed_close_to_expiry(self):
+        """Test a signature with too little time left is replaced"""
+
+        self.render_file_url()
+
+        with override_settings(SIGNED_URL_MIN_REMAINING=3600), \
+                patch('apps.common.utils.signed_urls.presign',
+                      wraps=signed_urls.presign) as presign:
+            self.render_file_url()
+
+        self.assertEqual(presign.call_count, 1)
+
+    def test_minio_urls_are_signed_for_clients(self):
+        """Test MinIO URLs are signed for the public media URL, only workers
+        get the internal endpoint
+        """
+
+        storage = Mock(bucket_name='media')
+
+        signed_urls.presign(storage, 'audio/chapter.mp3', 3600)
+        storage._presigned_url.assert_called_once_with(
+            'audio/chapter.mp3', timedelta(seconds=3600))
+        storage.client.presigned_get_object.assert_not_called()
+
+        signed_urls.presign(storage, 'audio/chapter.mp3', 3600, internal=True)
+        storage.client.presigned_get_object.assert_called_once_with(
+            'media', 'audio/chapter.mp3', expires=timedelta(seconds=3600))
@@ -0,0 +1,192 @@
+import io
+import tempfile
+import shutil
+from unittest.mock import Mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.common.utils.streaming import iter_range
+from apps.ecommerce.models import OrderMedia
+from apps.media.models import Format, Language, Media, Track
+
+MEDIA_ROOT = tempfile.mkdtemp()
+AUDIO = bytes(range(256)) * 40
+
+
+def stream_url(track_slug):
+    """Return the stream URL of a track"""
+
+    return reverse('media:tracks-stream',
+                   kwargs={'slug': track_slug, 'version': 'v1'})
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    MEDIA_ROOT=MEDIA_ROOT, STREAM_CHUNK_SIZE=1000,
+    STREAM_ACCEL_REDIRECT_PREFIX='')
+class TrackStreamApiTest(TestCase):
+    """Test streaming the audio of a track"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.media = Media.objects.create(
+            title='Sample media',
+            price=10,
+            description='Sample media',
+            media_format=Format.objects.create(name='Audiobook', sequence=1,
+                                               user=self.user),
+            language=Language.objects.create(name='Amharic', user=self.user),
+            user=self.user
+        )
+        self.track = Track.objects.create(name='Track', popularity=1,
+                                          duration=60, sequence=1,
+                                          user=self.user)
+        self.track.file_url.save('chapter.mp3', ContentFile(AUDIO))
+        self.media.tracks.add(self.track)
+        OrderMedia.objects.create(media=self.media, user=self.user,
+                                  ordered=True)
+
+    def test_full_file(self):
+        """Test the whole file is streamed in chunks with validators"""
+
+        res = self.client.get(stream_url(self.track.slug))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(res.streaming_content), AUDIO)
+        self.assertEqual(res['Content-Length'], str(len(AUDIO)))
+        self.assertEqual(res['Content-Type'], 'audio/mpeg')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+    def test_byte_ranges(self):
+        """Test open, closed and suffix ranges return partial content"""
+
+        for header, start, end in (
+                ('bytes=100-2099', 100, 2099),
+                ('bytes=10000-', 10000, len(AUDIO) - 1),
+                ('bytes=-240', len(AUDIO) - 240, len(AUDIO) - 1)):
+            res = self.client.get(stream_url(self.track.slug),
+                                  HTTP_RANGE=header)
+
+            self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(b''.join(res.streaming_content),
+                             AUDIO[start:end + 1])
+            self.assertEqual(res['Content-Range'],
+                             'bytes {}-{}/{}'.format(start, end, len(AUDIO)))
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end of the file is rejected"""
+
+        res = self.client.get(stream_url(self.track.slug),
+                              HTTP_RANGE='bytes={}-'.format(len(AUDIO)))
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(res['Content-Range'], 'bytes */{}'.format(len(AUDIO)))
+
+    def test_conditional_requests(self):
+        """Test a current ETag gets a 304 and a stale If-Range gets the whole
+        file
+        """
+
+        etag = self.client.get(stream_url(self.track.slug))['ETag']
+
+        res = self.client.get(stream_url(self.track.slug),
+                              HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.get(stream_url(self.track.slug),
+                              HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+
+        res = self.client.get(stream_url(self.track.slug),
+                              HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_not_purchased(self):
+        """Test a track of a media that isn't purchased can't be streamed
+        unless it is a sample
+        """
+
+        OrderMedia.objects.all().update(ordered=False)
+
+        res = self.client.get(stream_url(self.track.slug),
+                              HTTP_ACCEPT='audio/mpeg')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        Track.objects.filter(pk=self.track.pk).update(sample=True)
+        res = self.client.get(stream_url(self.track.slug))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(STREAM_ACCEL_REDIRECT_PREFIX='/protected/')
+    def test_accel_redirect(self):
+        """Test the bytes are left to nginx in offload mode"""
+
+        res = self.client.get(stream_url(self.track.slug))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Accel-Redirect'],
+                         '/protected/' + self.track.file_url.name)
+        self.assertEqual(res.content, b'')
+
+
+class MinioResponse(io.BytesIO):
+    """urllib3 response returned by the MinIO client"""
+
+    released = False
+
+    def release_conn(self):
+        self.released = True
+
+
+class ObjectStorageRangeTest(SimpleTestCase):
+    """Test ranges are requested from the object storages"""
+
+    def test_minio_range(self):
+        """Test MinIO is asked for the range and the connection is released"""
+
+        body = MinioResponse(AUDIO[100:2100])
+        client = Mock(**{'get_partial_object.return_value': body})
+        storage = Mock(spec=['client', 'bucket_name'], client=client,
+                       bucket_name='media')
+
+        chunks = list(iter_range(storage, 'audio/chapter.mp3', 100, 2099,
+                                 1000))
+
+        self.assertEqual(b''.join(chunks), AUDIO[100:2100])
+        client.get_partial_object.assert_called_once_with(
+            'media', 'audio/chapter.mp3', offset=100, length=2000)
+        self.assertTrue(body.released)
+
+    def test_s3_range(self):
+        """Test S3 is asked for the range of the key under its location"""
+
+        obj = Mock(**{'get.return_value': {'Body': io.BytesIO(AUDIO[:10])}})
+        storage = Mock(spec=['bucket', 'connection', '_normalize_name',
+                             '_clean_name'])
+        storage._clean_name.side_effect = lambda name: name
+        storage._normalize_name.side_effect = lambda name: 'media/' + name
+        storage.bucket.Object.return_value = obj
+
+        chunks = list(iter_range(storage, 'audio/chapter.mp3', 0, 9, 1000))
+
+        self.assertEqual(b''.join(chunks), AUDIO[:10])
+        storage.bucket.Object.assert_called_once_with(
+            'media/audio/chapter.mp3')
+        obj.get.assert_called_once_with(Range='bytes=0-9')
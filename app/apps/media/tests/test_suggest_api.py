@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework.test import APIClient
+
+from apps.media.models import Author, Narrator, Format, Language, Media
+
+SUGGEST_URL = reverse('media:suggest-list', kwargs={"version": "v1"})
+
+
+class SuggestApiTest(TestCase):
+    """Test the typeahead suggestion API"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('+251911000000',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        media_format = Format.objects.create(name='Audiobook', sequence=1,
+                                             user=self.user)
+        language = Language.objects.create(name='Amharic', user=self.user)
+        for title, status in (
+                ('Oromay', Media.StatusType.PUBLISHED),
+                ('The Oromo Chronicles', Media.StatusType.PUBLISHED),
+                ('Oromay draft', Media.StatusType.UNPUBLISHED)):
+            Media.objects.create(title=title, description='Sample media',
+                                 price=10, status=status,
+                                 media_format=media_format, language=language,
+                                 user=self.user)
+        Author.objects.create(name='Baalu Girma', sex='MALE', user=self.user)
+        Narrator.objects.create(name='Girum', sex='MALE', user=self.user)
+
+    def test_suggestions_are_ranked_and_capped(self):
+        """Test published titles are suggested closest match first"""
+
+        res = self.client.get(SUGGEST_URL, {'q': 'Oromay'})
+        self.assertEqual([media['title'] for media in res.data['medias']],
+                         ['Oromay'])
+
+        res = self.client.get(SUGGEST_URL, {'q': 'orom', 'limit': 1})
+        self.assertEqual(len(res.data['medias']), 1)
+
+    def test_suggest_authors_and_narrators(self):
+        """Test names of authors and narrators are suggested"""
+
+        res = self.client.get(SUGGEST_URL, {'q': 'gir'})
+
+        self.assertEqual([author['name'] for author in res.data['authors']],
+                         ['Baalu Girma'])
+        self.assertEqual(
+            [narrator['name'] for narrator in res.data['narrators']],
+            ['Girum'])
+
+    def test_suggestions_are_cached(self):
+        """Test a repeated prefix is served from the cache"""
+
+        self.client.get(SUGGEST_URL, {'q': 'orom'})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(SUGGEST_URL, {'q': ' Orom '})
+        self.assertEqual(len(res.data['medias']), 2)
+
+    def test_short_text_is_not_searched(self):
+        """Test text shorter than a trigram returns no suggestions"""
+
+        with self.assertNumQueries(0):
+            res = self.client.get(SUGGEST_URL, {'q': 'or'})
+        self.assertEqual(res.data['medias'], [])
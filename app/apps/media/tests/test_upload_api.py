@@ -0,0 +1,191 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.media.models import Blob, Track, TrackUpload
+
+MEDIA_ROOT = tempfile.mkdtemp()
+AUDIO = b'ID3' + bytes(range(256)) * 10
+
+
+def uploads_url(track_slug):
+    """Return the uploads URL of a track"""
+
+    return reverse('media:track_upload-list',
+                   kwargs={'track_slug': track_slug, 'version': 'v1'})
+
+
+def upload_url(track_slug, upload_slug, name='detail'):
+    """Return the URL of an upload of a track"""
+
+    return reverse('media:track_upload-{}'.format(name),
+                   kwargs={'track_slug': track_slug, 'slug': upload_slug,
+                           'version': 'v1'})
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    MEDIA_ROOT=MEDIA_ROOT, TRACK_UPLOAD_MIN_CHUNK_SIZE=1000,
+    TRACK_UPLOAD_MAX_CHUNK_SIZE=2000)
+class TrackUploadApiTest(TestCase):
+    """Test the resumable track upload API"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        # parts of the uploads other tests didn't finish
+        shutil.rmtree(os.path.join(MEDIA_ROOT, 'audio', 'uploads'),
+                      ignore_errors=True)
+
+        self.user = get_user_model().objects.create_superuser(
+            '+251911000000', 'testpass', name='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.track = Track.objects.create(name='Track', popularity=1,
+                                          duration=60, sequence=1,
+                                          user=self.user)
+
+    def staged_files(self):
+        return os.listdir(os.path.join(MEDIA_ROOT, 'audio', 'uploads'))
+
+    def start_upload(self, size=len(AUDIO)):
+        res = self.client.post(uploads_url(self.track.slug),
+                               {'filename': 'chapter.mp3', 'size': size})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['slug']
+
+    def send_chunk(self, upload_slug, offset, data):
+        return self.client.patch(
+            upload_url(self.track.slug, upload_slug), data,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_resumable_upload(self):
+        """Test chunks are appended by offset and finalize publishes the file
+        to the track
+        """
+
+        slug = self.start_upload()
+
+        res = self.send_chunk(slug, 0, AUDIO[:1500])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Upload-Offset'], '1500')
+
+        # a resent chunk is rejected with the offset to resume from
+        res = self.send_chunk(slug, 0, AUDIO[:1500])
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['offset'], 1500)
+
+        res = self.client.get(upload_url(self.track.slug, slug))
+        self.assertEqual(res.data['offset'], 1500)
+
+        res = self.send_chunk(slug, 1500, AUDIO[1500:])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # the chunks were hashed as they arrived, the file isn't read again
+        with patch.object(FileSystemStorage, 'open') as open_file:
+            res = self.client.post(upload_url(self.track.slug, slug,
+                                              'finalize'))
+        open_file.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], TrackUpload.StatusType.COMPLETED)
+
+        self.track.refresh_from_db()
+        digest = hashlib.sha256(AUDIO).hexdigest()
+        self.assertEqual(self.track.file_url.name,
+                         'audio/{}/{}.mp3'.format(digest[:2], digest))
+        with self.track.file_url.open('rb') as f:
+            self.assertEqual(f.read(), AUDIO)
+        self.assertEqual(self.staged_files(), [])
+
+    def test_uploaded_file_is_deduplicated(self):
+        """Test an upload of bytes that are already stored reuses the stored
+        file
+        """
+
+        other = Track.objects.create(name='Other', popularity=1, duration=60,
+                                     sequence=2, user=self.user)
+        other.file_url.save('chapter.mp3', ContentFile(AUDIO))
+
+        slug = self.start_upload()
+        self.send_chunk(slug, 0, AUDIO[:1500])
+        self.send_chunk(slug, 1500, AUDIO[1500:])
+        res = self.client.post(upload_url(self.track.slug, slug, 'finalize'))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.file_url.name, other.file_url.name)
+        self.assertEqual(Blob.objects.get(name=other.file_url.name).ref_count,
+                         2)
+        self.assertEqual(self.staged_files(), [])
+
+    def test_small_chunk_is_rejected(self):
+        """Test chunks but the last one have to reach the minimum part size"""
+
+        slug = self.start_upload()
+
+        res = self.send_chunk(slug, 0, AUDIO[:500])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_first_chunk_type_is_sniffed(self):
+        """Test an upload that doesn't start like an audio file is rejected"""
+
+        slug = self.start_upload()
+
+        res = self.send_chunk(slug, 0, b'not audio' * 200)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(TrackUpload.objects.get(slug=slug).offset, 0)
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        """Test finalize waits for every byte"""
+
+        slug = self.start_upload()
+        self.send_chunk(slug, 0, AUDIO[:1500])
+
+        res = self.client.post(upload_url(self.track.slug, slug, 'finalize'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_abort_upload(self):
+        """Test deleting an upload removes the received bytes"""
+
+        slug = self.start_upload()
+        self.send_chunk(slug, 0, AUDIO[:1500])
+
+        res = self.client.delete(upload_url(self.track.slug, slug))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(TrackUpload.objects.exists())
+        self.assertEqual(self.staged_files(), [])
+
+    def test_part_is_stored_outside_the_row_lock(self):
+        """Test the upload row isn't locked while the part is stored"""
+
+        slug = self.start_upload()
+        depth = len(connection.atomic_blocks)
+        depths = []
+
+        def upload_part(*args):
+            depths.append(len(connection.atomic_blocks))
+            return '1'
+
+        with patch('apps.common.utils.multipart.FileSystemMultipartUpload'
+                   '.upload_part', side_effect=upload_part):
+            res = self.send_chunk(slug, 0, AUDIO[:1500])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(depths, [depth])
@@ -19,6 +19,8 @@ router.register('tracks', views.TrackViewSet, 'tracks')
 router.register('home', views.HomeAPIView, 'home')
 # /searchby
 router.register('searchby', views.SearchByAPIView, 'searchby')
+# /suggest
+router.register('suggest', views.SuggestAPIView, 'suggest')
 
 # /medias/:media_slug/tracks
 tracks_router = routers.NestedSimpleRouter(router, r'medias', lookup='media')
@@ -32,9 +34,15 @@ like_router.register(r'like', views.MediaLikeNestedViewSet, basename='media_like
 download_router = routers.NestedSimpleRouter(router, r'tracks', lookup='track')
 download_router.register(r'download', views.TrackDownloadNestedViewSet, basename='track_download')
 
+# /tracks/:track_slug/uploads
+upload_router = routers.NestedSimpleRouter(router, r'tracks', lookup='track')
+upload_router.register(r'uploads', views.TrackUploadNestedViewSet,
+                       basename='track_upload')
+
 urlpatterns = [
     path('', include(router.urls)),
     path('', include(tracks_router.urls)),
     path('', include(download_router.urls)),
+    path('', include(upload_router.urls)),
     path('', include(like_router.urls)),
 ]
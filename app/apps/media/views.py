@@ -1,18 +1,46 @@
+import hashlib
+import mimetypes
+import os
+from secrets import token_urlsafe
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils.http import parse_etags, quote_etag
+from django.utils.text import slugify
+from django.utils.translation import gettext_lazy as _
+
 from rest_framework import viewsets, mixins, status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import DjangoModelPermissionsOrAnonReadOnly, \
     IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, \
+    ValidationError
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST
 
-from apps.media.models import Genre, Track, Media, Format, Language, TrackDownload, MediaLike
+from apps.media.models import Genre, Track, Media, Format, Language, \
+    TrackDownload, MediaLike, Author, Narrator, TrackUpload, format_rating
 from apps.media import serializers
-
-
-# from apps.media.tasks.encode_track_task import encode_track
+from apps.media.search import search_medias, suggest
+from apps.media.events import log_track_download
+from apps.common.utils.pagination import KeysetPagination
+from apps.common.utils.streaming import stream_file, \
+    IgnoreClientContentNegotiation
+from apps.common.utils.check import is_track_available
+from apps.common.utils.fields import digest_name
+from apps.common.utils.hashing import ResumableSHA256
+from apps.common.utils.multipart import MultipartUpload
+from apps.common.utils.validators import validate_file_type
+from apps.media.cache import HOME_CACHE_KEY, HOME_CACHE_TIMEOUT, \
+    SUGGEST_CACHE_KEY, SUGGEST_CACHE_TIMEOUT, get_searchby_version, \
+    get_searchby
 
 
 class BaseViewSet(viewsets.GenericViewSet,
@@ -21,7 +49,8 @@ class BaseViewSet(viewsets.GenericViewSet,
     """Base viewset for media app"""
 
     permission_classes = (IsAuthenticated, DjangoModelPermissionsOrAnonReadOnly)
-    pagination_class = PageNumberPagination
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-id',)
     lookup_field = 'slug'
 
     def perform_create(self, serializer):
@@ -57,6 +86,15 @@ class TrackViewSet(BaseViewSet):
 
     queryset = Track.objects.all()
     serializer_class = serializers.TrackSerializer
+    keyset_ordering = ('-sequence', '-id')
+
+    def get_queryset(self):
+        """Load the medias and the user's download status with the tracks"""
+
+        if self.action == 'stream':
+            return self.queryset
+        return self.queryset.with_download_status(self.request.user) \
+            .prefetch_related('medias')
 
     def get_serializer_class(self):
         """Return appropriate serializer class"""
@@ -89,6 +127,25 @@ class TrackViewSet(BaseViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    @action(methods=['GET'], detail=True, url_path='stream',
+            content_negotiation_class=IgnoreClientContentNegotiation)
+    def stream(self, request, slug=None, version=None, ):
+        """Stream the audio of a track, supports Range and conditional
+        requests
+        """
+
+        track = self.get_object()
+        if not track.file_url:
+            raise NotFound(_('Track has no audio file'))
+        if not is_track_available(request, track):
+            raise PermissionDenied(_('Purchase the media to play this track'))
+
+        name = track.file_url.name
+        stamp = '{}:{}'.format(name, track.updated_at.isoformat())
+        etag = quote_etag(hashlib.md5(stamp.encode()).hexdigest())
+        return stream_file(request, track.file_url.storage, name, etag,
+                           track.updated_at)
+
     # def get_queryset(self):
     #     """Return objects for the current authenticated account"""
     #
@@ -104,6 +161,9 @@ class MediaViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAuthenticated, DjangoModelPermissionsOrAnonReadOnly)
     filter_backends = (SearchFilter, OrderingFilter)
     search_fields = ['title', 'authors__name']
+    pagination_class = KeysetPagination
+    # replaces the search rank and ?ordering in cursor mode
+    keyset_ordering = ('-id',)
     lookup_field = 'slug'
 
     def perform_create(self, serializer):
@@ -158,6 +218,7 @@ class MediaViewSet(viewsets.ModelViewSet):
         # tracks = self.request.query_params.get('tracks')
         category = self.request.query_params.get('category')
         lang = self.request.query_params.get('language')
+        text = self.request.query_params.get('q')
         queryset = self.queryset
 
         if genres:
@@ -174,7 +235,11 @@ class MediaViewSet(viewsets.ModelViewSet):
         if lang:
             queryset = queryset.filter(language__slug=lang)
 
-        return queryset  # .filter(account=self.request.account)
+        if text:
+            queryset = search_medias(queryset, text)
+
+        # .filter(account=self.request.account)
+        return queryset.for_display(self.request.user)
 
 
 # /medias/:media_slug/tracks
@@ -185,8 +250,10 @@ class TrackNestedViewSet(viewsets.ViewSet):
     serializer_class = serializers.TrackSerializer
 
     def list(self, request, *args, **kwargs):
-        queryset = self.queryset.filter(medias__slug=kwargs['media_slug'])
-        serializer = self.serializer_class(queryset, many=True)
+        queryset = self.queryset.filter(medias__slug=kwargs['media_slug']) \
+            .with_download_status(request.user).prefetch_related('medias')
+        serializer = self.serializer_class(queryset, many=True,
+                                           context={'request': request})
         return Response(serializer.data)
 
     def create(self, request, *args, **kwargs):
@@ -221,25 +288,187 @@ class TrackDownloadNestedViewSet(viewsets.ViewSet):
 
     def create(self, request, *args, **kwargs):
         try:
-            # check that the slug passed in the route exists in the database
-            track = Track.objects.get(slug=kwargs['track_slug'])
-            # assign the slug to track in the request
-            request.data['track'] = track.slug
-            # Get the TrackDownload model which have the specified track and user, if it doesn't exist, create it
-            track_download, created = TrackDownload.objects.get_or_create(track=track, user=self.request.user)
-
-            # assign the track data in the class's serializer
-            serializer = self.serializer_class(track_download, data=request.data)
-            # validate the track data
+            # validate the download status
+            serializer = self.serializer_class(data=request.data)
             serializer.is_valid(raise_exception=True)
-            # save the track data
-            serializer.save(user=self.request.user)
+            # one upsert per user and track, it fails when the slug passed in
+            # the route doesn't exist
+            download_status = serializer.validated_data['status']
+            track_id = TrackDownload.objects.set_status(
+                kwargs['track_slug'], self.request.user, download_status)
+            # keep the history out of the request, it is written in batches
+            log_track_download(track_id, self.request.user.pk,
+                               download_status)
         except Exception as e:
             return Response({"detail": str(e)},
                             status=HTTP_400_BAD_REQUEST)
         return Response(status=HTTP_201_CREATED)
 
 
+# /tracks/:track_slug/uploads
+class TrackUploadNestedViewSet(viewsets.ViewSet):
+    """Resumable upload of a track's audio file.
+
+    POST creates an upload for a filename and size. PATCH sends the next chunk
+    as the raw request body with its position in the Upload-Offset header, each
+    chunk is stored as a part of a multipart upload. GET returns the offset to
+    resume from. POST .../finalize publishes the file as the track's file_url.
+    """
+
+    pagination_class = None
+    permission_classes = (IsAuthenticated,
+                          DjangoModelPermissionsOrAnonReadOnly)
+    queryset = TrackUpload.objects.all()
+    serializer_class = serializers.TrackUploadSerializer
+    lookup_field = 'slug'
+
+    def _get_upload(self, request, kwargs, lock=False):
+        queryset = self.queryset.select_related('track') \
+            .filter(user=request.user)
+        if lock:
+            queryset = queryset.select_for_update(of=('self',))
+        return get_object_or_404(queryset, track__slug=kwargs['track_slug'],
+                                 slug=kwargs['slug'])
+
+    def _response(self, upload, **kwargs):
+        return Response(self.serializer_class(upload).data,
+                        headers={'Upload-Offset': str(upload.offset)},
+                        **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        track = get_object_or_404(Track, slug=kwargs['track_slug'])
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # staged under a random name, finalize moves it to its content hash
+        ext = os.path.splitext(serializer.validated_data.pop('filename'))[-1]
+        name = os.path.join(settings.TRACK_FILE_DIR, 'uploads', '{}{}'.format(
+            slugify(token_urlsafe(16)), ext.lower()))
+        content_type = mimetypes.guess_type(name)[0] or \
+            'application/octet-stream'
+        upload_id = MultipartUpload.for_storage(track.file_url.storage) \
+            .start(name, content_type)
+
+        upload = serializer.save(track=track, user=request.user, name=name,
+                                 upload_id=upload_id)
+        return self._response(upload, status=HTTP_201_CREATED)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._response(self._get_upload(request, kwargs))
+
+    def _check_chunk(self, upload, offset, length):
+        """Validate a chunk against the upload. Returns the 409 response of
+        a chunk at another offset than the upload's.
+        """
+
+        if upload.status != TrackUpload.StatusType.UPLOADING:
+            raise ValidationError(_('Upload is already completed'))
+        if offset != upload.offset:
+            # the client resumes from the returned offset
+            return self._response(upload, status=status.HTTP_409_CONFLICT)
+
+        last = offset + length == upload.size
+        if length <= 0 or offset + length > upload.size or \
+                length > settings.TRACK_UPLOAD_MAX_CHUNK_SIZE or \
+                (not last and length < settings.TRACK_UPLOAD_MIN_CHUNK_SIZE):
+            raise ValidationError(_(
+                'Chunks should be {} to {} bytes, only the last one can be '
+                'smaller').format(settings.TRACK_UPLOAD_MIN_CHUNK_SIZE,
+                                  settings.TRACK_UPLOAD_MAX_CHUNK_SIZE))
+        return None
+
+    def partial_update(self, request, *args, **kwargs):
+        try:
+            offset = int(request.META['HTTP_UPLOAD_OFFSET'])
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            raise ValidationError(_(
+                'Upload-Offset and Content-Length headers are required'))
+
+        upload = self._get_upload(request, kwargs)
+        conflict = self._check_chunk(upload, offset, length)
+        if conflict is not None:
+            return conflict
+
+        # read the body as is, without the upload handlers
+        data = request.read(length)
+        if len(data) != length:
+            raise ValidationError(_('Chunk is incomplete'))
+        if offset == 0:
+            # only the head of the file is needed to sniff the type
+            validate_file_type(data)
+
+        # the part is stored and hashed outside the transaction, the row is
+        # only locked to check the offset again and record the part
+        part_number = len(upload.parts) + 1
+        etag = MultipartUpload.for_storage(upload.track.file_url.storage) \
+            .upload_part(upload.name, upload.upload_id, part_number, offset,
+                         data)
+        hasher = ResumableSHA256(upload.sha256_state)
+        hasher.update(data)
+
+        with transaction.atomic():
+            upload = self._get_upload(request, kwargs, lock=True)
+            conflict = self._check_chunk(upload, offset, length)
+            if conflict is not None:
+                return conflict
+
+            upload.parts.append([part_number, etag])
+            upload.offset += length
+            # the offset is unchanged, so is the state the chunk was hashed on
+            upload.sha256_state = hasher.state
+            upload.save(update_fields=['parts', 'offset', 'sha256_state',
+                                       'updated_at'])
+
+        return self._response(upload)
+
+    @action(methods=['POST'], detail=True, url_path='finalize')
+    def finalize(self, request, *args, **kwargs):
+        upload = self._get_upload(request, kwargs)
+        if upload.status == TrackUpload.StatusType.COMPLETED:
+            return self._response(upload)
+        if upload.offset != upload.size:
+            raise ValidationError(_('Upload is incomplete'))
+
+        # stored by the hash of its content like the other track files, the
+        # chunks were hashed as they arrived so the bytes aren't read again.
+        # Bytes that are already stored are reused.
+        track = upload.track
+        storage = track.file_url.storage
+        name = digest_name(track.file_url.field.upload_to, upload.name,
+                           ResumableSHA256(upload.sha256_state).hexdigest())
+        multipart = MultipartUpload.for_storage(storage)
+        multipart.complete(upload.name, upload.upload_id, upload.parts)
+        if storage.exists(name):
+            storage.delete(upload.name)
+        else:
+            multipart.move(upload.name, name)
+
+        # the storage calls are done, the lock only covers pointing the track
+        # at the file
+        with transaction.atomic():
+            upload = self._get_upload(request, kwargs, lock=True)
+            if upload.status == TrackUpload.StatusType.COMPLETED:
+                return self._response(upload)
+
+            track = upload.track
+            track.file_url.name = name
+            track.save()
+
+            upload.status = TrackUpload.StatusType.COMPLETED
+            upload.save(update_fields=['status', 'updated_at'])
+
+        return self._response(upload)
+
+    def destroy(self, request, *args, **kwargs):
+        upload = self._get_upload(request, kwargs)
+        if upload.status == TrackUpload.StatusType.UPLOADING:
+            MultipartUpload.for_storage(upload.track.file_url.storage) \
+                .abort(upload.name, upload.upload_id)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 # /home
 class HomeAPIView(viewsets.ViewSet):
     """Custom queryset api view. Does not implement pagination"""
@@ -250,31 +479,78 @@ class HomeAPIView(viewsets.ViewSet):
     featured_size = 5  # count limit for featured medias
 
     def list(self, request, *args, **kwargs):
-        queryset = Media.objects.all()
+        # the sections are the same for every user, only liked and downloaded
+        # differ
+        home_response = cache.get(HOME_CACHE_KEY)
+        if home_response is None:
+            home_response = self._build_home_response()
+            cache.set(HOME_CACHE_KEY, home_response, HOME_CACHE_TIMEOUT)
+
+        self._merge_user_state(home_response, request.user)
+        return Response(home_response)
+
+    def _build_home_response(self):
+        """Build the user independent home sections"""
+
+        queryset = Media.objects.filter(status=Media.StatusType.PUBLISHED)
         home_response = []
 
         # Featured media
         f = {'id': 'featured', 'title': 'Featured'}
-        qs = queryset.filter(featured=True,
-                             status=Media.StatusType.PUBLISHED).order_by('-created_at')[:self.featured_size]
-        if qs.count():
-            serializer = serializers.MediaSerializer(qs, many=True)
-            f["medias"] = serializer.data
+        qs = queryset.filter(featured=True).order_by('-created_at') \
+            .for_display()[:self.featured_size]
+        medias = serializers.MediaSerializer(qs, many=True).data
+        if medias:
+            f["medias"] = medias
         home_response.append(f)
 
+        # Latest media of every format in one query:
+        # ROW_NUMBER() OVER (PARTITION BY media_format_id
+        #                    ORDER BY created_at DESC) <= slice_size
+        latest = list(queryset.annotate(row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('media_format')],
+            order_by=F('created_at').desc()
+        )).filter(row_number__lte=self.slice_size).order_by('-created_at')
+            .for_display())
+
+        medias_by_format = defaultdict(list)
+        data = serializers.MediaSerializer(latest, many=True).data
+        for media, media_data in zip(latest, data):
+            medias_by_format[media.media_format_id].append(media_data)
+
         # Media by format
         format_qs = Format.objects.all().order_by('sequence')
         for format in format_qs:
-
-            qs = queryset.filter(media_format=format.id,
-                                 status=Media.StatusType.PUBLISHED).order_by('-created_at')[:self.slice_size]
-            if qs.count():
+            if medias_by_format[format.id]:
                 f = {'id': format.slug, 'title': format.name}
-                serializer = serializers.MediaSerializer(qs, many=True)
-                f["medias"] = serializer.data
+                f["medias"] = medias_by_format[format.id]
                 home_response.append(f)
 
-        return Response(home_response)
+        return home_response
+
+    def _merge_user_state(self, home_response, user):
+        """Set the liked and downloaded flags of the requesting user"""
+
+        medias = [media for section in home_response
+                  for media in section.get('medias', [])]
+        media_slugs = {media['slug'] for media in medias}
+        track_slugs = {track['slug'] for media in medias
+                       for track in media['tracks']}
+
+        liked = set(MediaLike.objects.filter(
+            user=user, liked=True, media__slug__in=media_slugs
+        ).values_list('media__slug', flat=True))
+
+        download_status = dict(TrackDownload.objects.filter(
+            user=user, track__slug__in=track_slugs
+        ).values_list('track__slug', 'status'))
+
+        for media in medias:
+            media['liked'] = media['slug'] in liked
+            for track in media['tracks']:
+                track['downloaded'] = download_status.get(track['slug']) == \
+                    TrackDownload.StatusType.DOWNLOADED
 
 
 # /searchby
@@ -285,22 +561,76 @@ class SearchByAPIView(viewsets.ViewSet):
     permission_classes = (IsAuthenticated,)
 
     def list(self, request, *args, **kwargs):
+        version = get_searchby_version()
+        etag = '"searchby-{}"'.format(version)
+
+        # the client already has this version of the facets
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': etag})
+
+        response = get_searchby(version, self._build_response)
+        return Response(response, headers={'ETag': etag})
+
+    def _build_response(self):
         response = {}
 
-        language_qs = Language.objects.all().order_by('name')
-        if language_qs.count():
-            serializer = serializers.LanguageSerializer(language_qs, many=True)
-            response["languages"] = serializer.data
+        languages = serializers.LanguageSerializer(
+            Language.objects.all().order_by('name'), many=True).data
+        if languages:
+            response["languages"] = languages
 
-        format_qs = Format.objects.all().order_by('sequence')
-        if format_qs.count():
-            serializer = serializers.FormatSerializer(format_qs, many=True)
-            response["formats"] = serializer.data
+        formats = serializers.FormatSerializer(
+            Format.objects.all().order_by('sequence'), many=True).data
+        if formats:
+            response["formats"] = formats
+
+        genres = serializers.GenreSerializer(
+            Genre.objects.all().order_by('name'), many=True).data
+        if genres:
+            response["genres"] = genres
+
+        return response
 
-        genre_qs = Genre.objects.all().order_by('name')
-        if genre_qs.count():
-            serializer = serializers.GenreSerializer(genre_qs, many=True)
-            response["genres"] = serializer.data
+
+# /suggest
+class SuggestAPIView(viewsets.ViewSet):
+    """Typeahead suggestions for the search box. Does not implement
+    pagination
+    """
+
+    pagination_class = None
+    permission_classes = (IsAuthenticated,)
+    # shorter text has no trigram for the index to look up
+    min_length = 3
+    default_limit = 5  # suggestions per group
+    max_limit = 10
+
+    def list(self, request, *args, **kwargs):
+        text = ' '.join(request.query_params.get('q', '').split()).lower()
+        try:
+            limit = min(int(request.query_params.get('limit',
+                                                     self.default_limit)),
+                        self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+
+        if len(text) < self.min_length or limit < 1:
+            return Response({'medias': [], 'authors': [], 'narrators': []})
+
+        key = SUGGEST_CACHE_KEY.format(limit,
+                                       hashlib.md5(text.encode()).hexdigest())
+        response = cache.get(key)
+        if response is None:
+            published = Media.objects.filter(
+                status=Media.StatusType.PUBLISHED)
+            response = {
+                'medias': suggest(published, 'title', text, limit),
+                'authors': suggest(Author.objects.all(), 'name', text, limit),
+                'narrators': suggest(Narrator.objects.all(), 'name', text,
+                                     limit),
+            }
+            cache.set(key, response, SUGGEST_CACHE_TIMEOUT)
 
         return Response(response)
 
@@ -319,23 +649,16 @@ class MediaLikeNestedViewSet(viewsets.ViewSet):
 
     def create(self, request, *args, **kwargs):
         try:
-            print("create")
-            # check that the slug passed in the route exists in the database
-            media = Media.objects.get(slug=kwargs['media_slug'])
-            # assign the slug to media in the request
-            request.data['media'] = media.slug
-
-            # Search the Like model which have the specified media and user, if it doesn't exist, create it
-            media_like, created = MediaLike.objects.get_or_create(media=media, user=self.request.user)
-
-            # If we passing the media_like instance to the serializer class during initialization, it will
-            # update the media like when we call the save method on the serializer object.
-            serializer = self.serializer_class(media_like, data=request.data)
-            # validate the track data
+            # validate the liked state
+            serializer = self.serializer_class(data=request.data)
             serializer.is_valid(raise_exception=True)
-            # save the track data
-            serializer.save(user=self.request.user)
-            rating = media.get_rating()
+            # one upsert per user and media that also moves the like counter
+            # when the liked state flips, it fails when the slug passed in
+            # the route doesn't exist
+            like_count = MediaLike.objects.set_liked(
+                kwargs['media_slug'], self.request.user,
+                serializer.validated_data.get('liked', True))
+            rating = format_rating(like_count)
         except Exception as e:
             return Response({"detail": str(e)},
                             status=HTTP_400_BAD_REQUEST)
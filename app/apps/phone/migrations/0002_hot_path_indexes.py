@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:47
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # build the indexes without locking the tables against writes
+    atomic = False
+
+    dependencies = [
+        ('phone', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='phoneverification',
+            index=models.Index(fields=['phone_number'], name='phone_number_idx'),
+        ),
+    ]
@@ -20,6 +20,9 @@ class PhoneVerification(TimeStampedModel):
         verbose_name = _("Phone Number Verification")
         verbose_name_plural = _("Phone Number Verifications")
         unique_together = ("security_code", "phone_number", "session_token")
+        indexes = [
+            models.Index(fields=['phone_number'], name='phone_number_idx'),
+        ]
 
     def __str__(self):
         if self.user.name:
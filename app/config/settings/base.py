@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # django rest frameworks
     'rest_framework',
@@ -74,6 +75,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.ecommerce.context_processors.cart',
             ],
         }
     },
@@ -148,12 +150,65 @@ LOGIN_REDIRECT_URL = '/'
 
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
+# uploads are hashed while they are received, files are stored by their hash
+FILE_UPLOAD_HANDLERS = [
+    'apps.common.utils.upload_handlers.HashingMemoryFileUploadHandler',
+    'apps.common.utils.upload_handlers.HashingTemporaryFileUploadHandler',
+]
+
+# validators read the image size and the file type from this many leading
+# bytes of an upload
+UPLOAD_HEADER_SIZE = 64 * 1024
+
 # Image manipulation
 IMAGE_DIR = 'images'
+# every ImageSize is rendered in these formats, AVIF is skipped when Pillow
+# can't encode it
+IMAGE_RENDITION_FORMATS = ['PNG', 'WEBP', 'AVIF']
+IMAGE_RENDITION_QUALITY = 80
+IMAGE_RENDITION_UPLOAD_WORKERS = 4
 
 # Track File
 TRACK_FILE_DIR = 'audio'
 
+# Signed direct download URLs of tracks and images
+SIGNED_URL_TTL = 60 * 60
+# a cached signature is reused until it has less than this left, keep it
+# above HOME_CACHE_TIMEOUT
+SIGNED_URL_MIN_REMAINING = 15 * 60
+SIGNED_URL_CACHE_SIZE = 10000
+
+# Resumable track uploads
+# S3 needs every part but the last one to be at least 5 MB
+TRACK_UPLOAD_MIN_CHUNK_SIZE = 5 * 1024 * 1024
+TRACK_UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+TRACK_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
+# Track transcoding and metadata
+FFMPEG_BINARY = 'ffmpeg'
+TRACK_RENDITION_BITRATES = [32, 64, 128]  # kbps
+TRACK_HLS_SEGMENT_SECONDS = 10
+TRACK_ENCODE_TIMEOUT = 60 * 60
+FFPROBE_BINARY = 'ffprobe'
+TRACK_PROBE_TIMEOUT = 60
+
+# Track streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+# e.g. '/protected/' to let nginx serve the bytes of an internal location,
+# empty to stream from django
+STREAM_ACCEL_REDIRECT_PREFIX = config('STREAM_ACCEL_REDIRECT_PREFIX',
+                                      default='')
+
+# Full text search
+# 'simple' does not stem, which suits the mix of languages in the catalog
+MEDIA_SEARCH_CONFIG = 'simple'
+
+# Track download history
+# events are queued per process and written together once the queue is full
+# or the flush interval has passed
+TRACK_DOWNLOAD_EVENT_BATCH_SIZE = 100
+TRACK_DOWNLOAD_EVENT_FLUSH_SECONDS = 5
+
 # Twilio
 
 PHONE_VERIFICATION = {